@@ -25,6 +25,7 @@
         'data/ir_cron.xml',
         'wizard/slide_channel_reject_views.xml',
         'wizard/slide_channel_schedule_views.xml',
+        'wizard/slide_channel_publicacion_informe_views.xml',
         'views/slide_channel_views.xml',
         'views/slide_slide_views.xml',
         'views/slide_gradebook_views.xml',
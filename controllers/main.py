@@ -1,60 +1,115 @@
-from odoo import http, fields, _
-from odoo.http import request
+from odoo import api, http, fields, tools, SUPERUSER_ID, _
+from odoo.http import request, content_disposition
+from odoo.exceptions import ValidationError
 from odoo.addons.website_slides.controllers.main import WebsiteSlides
+from odoo.modules.registry import Registry
+from odoo.osv import expression
+from odoo.tools.lru import LRU
+import csv
+import io
+import os
+import re
+import time
+import zipfile
+from werkzeug.exceptions import NotFound
+from werkzeug.wrappers import Response
+
+
+# Caché de páginas del catálogo para visitantes anónimos (por proceso).
+# La clave incluye la versión del catálogo (secuencia en BD), que se incrementa al cambiar un curso.
+CACHE_CATALOGO = LRU(256)
+CACHE_CATALOGO_TTL = 600 # segundos: red de seguridad para datos no versionados (nº de alumnos, etc.)
+MARCA_CSRF = '__universidad_csrf_token__'
+# Claves de sesión de website_sale con estado propio del visitante (carrito en la cabecera)
+SESION_CARRITO = ('sale_order_id', 'website_sale_cart_quantity')
+# Cabeceras que no se guardan con la página: se recalculan o son de la sesión que la generó
+CABECERAS_NO_CACHEABLES = ('content-length', 'set-cookie')
 
-import base64
 
 class UniversityWebsiteSlides(WebsiteSlides):
     
     def _get_university_domain(self):
         """ Filtro base para ocultar Asignaturas y Cursos no publicados por la Universidad """
-        return [('tipo_curso', '!=', 'asignatura'), ('estado_universidad', '=', 'publicado')]
+        return request.env['slide.channel']._get_dominio_catalogo_publico()
+
+    def _clave_cache_catalogo(self):
+        """ Clave de la página en la caché del catálogo, o None si la petición no es cacheable """
+        if request.httprequest.method != 'GET' or not request.env.user._is_public():
+            return None
+        # Un visitante con pedido o carrito ve su contador en la cabecera: página propia
+        if any(request.session.get(clave) for clave in SESION_CARRITO):
+            return None
+        website = request.env['website'].get_current_website()
+        return (
+            request.env.cr.dbname,
+            request.env['slide.channel']._get_version_catalogo(),
+            website.id,
+            request.env.lang,
+            # Tarifa y posición fiscal efectivas (sesión o GeoIP): determinan los precios mostrados
+            website.pricelist_id.id,
+            website.fiscal_position_id.id,
+            request.httprequest.path,
+            tuple(sorted(request.httprequest.args.items(multi=True))),
+        )
+
+    def _servir_catalogo_cacheado(self, render):
+        """ Sirve la página desde la caché para visitantes anónimos; si no está, la renderiza y la guarda """
+        clave = self._clave_cache_catalogo()
+        if clave is None:
+            return render()
+
+        cacheada = CACHE_CATALOGO.get(clave)
+        if cacheada and time.monotonic() - cacheada[0] < CACHE_CATALOGO_TTL:
+            dummy, body, headers = cacheada
+            # El token CSRF es de la sesión del visitante: se reinyecta en cada respuesta
+            return request.make_response(body.replace(MARCA_CSRF, request.csrf_token()), headers=headers)
+
+        response = render()
+        if response.status_code != 200 or not getattr(response, 'is_qweb', False):
+            return response
+        response.flatten()
+        body = response.get_data(as_text=True)
+        # Guardamos todas las cabeceras salvo las de la sesión que la generó (cookies) y la longitud
+        headers = [
+            (nombre, valor) for nombre, valor in response.headers.items()
+            if nombre.lower() not in CABECERAS_NO_CACHEABLES
+        ]
+        CACHE_CATALOGO[clave] = (time.monotonic(), body.replace(request.csrf_token(), MARCA_CSRF), headers)
+        return response
 
     @http.route('/slides', type='http', auth="public", website=True, sitemap=True)
     def slides_channel_home(self, **post):
         """ Sobrescribimos la home para filtrar Asignaturas y Cursos no publicados """
+        return self._servir_catalogo_cacheado(lambda: self._slides_channel_home_universidad(**post))
+
+    def _slides_channel_home_universidad(self, **post):
+        """ Home estándar con las listas (Popular, Newest, Mis cursos) sacadas de una búsqueda
+        que ya aplica el filtro de la Universidad en SQL, en lugar de filtrarlas en memoria.
+        """
         response = super().slides_channel_home(**post)
-        
-        # Si la respuesta es una renderización, filtramos los datos
-        if response.qcontext:
-            # Filtramos las listas estándar (Popular, Newest, etc)
-            for list_name in ['channels_my', 'channels_popular', 'channels_newest']:
-                if list_name in response.qcontext:
-                    channels = response.qcontext[list_name]
-                    # Filtramos en memoria para no romper la lazy evaluation si es posible,
-                    # pero comúnmente es un recordset.
-                    if channels:
-                        # Ocultar asignaturas y ocultar no publicados (Defensa en profundidad)
-                        # Nota: estado_universidad ya debería estar filtrado si website_published=False,
-                        # pero este doble check evita fugas si alguien fuerza website_published=True manualmente.
-                        filtered = channels.filtered(
-                            lambda c: c.tipo_curso != 'asignatura' and c.estado_universidad == 'publicado'
-                        )
-                        response.qcontext[list_name] = filtered
-        
+        if not response.qcontext:
+            return response
+
+        # Sustituimos las listas del controlador estándar antes del render (son lazy: su búsqueda
+        # sin filtrar no llega a ejecutarse)
+        Channel = request.env['slide.channel']
+        channels_all = tools.lazy(lambda: Channel.search(
+            expression.AND([request.website.website_domain(), self._get_university_domain()])
+        ))
+        if not request.env.user._is_public():
+            # Los cursos completados van al final (mismo criterio que el estándar)
+            response.qcontext['channels_my'] = tools.lazy(lambda: channels_all.filtered(
+                lambda channel: channel.is_member
+            ).sorted(lambda channel: 0 if channel.completed else channel.completion, reverse=True)[:3])
+        response.qcontext['channels_popular'] = tools.lazy(lambda: channels_all.sorted('total_votes', reverse=True)[:3])
+        response.qcontext['channels_newest'] = tools.lazy(lambda: channels_all.sorted('create_date', reverse=True)[:3])
         return response
 
     @http.route('/slides/all', type='http', auth="public", website=True, sitemap=True)
     def slides_channel_all(self, slide_type=None, my=False, **post):
         """ Sobrescribimos la vista 'All Courses' para ocultar asignaturas """
-        response = super().slides_channel_all(slide_type, my, **post)
-        if response.qcontext.get('channels'):
-             response.qcontext['channels'] = response.qcontext['channels'].filtered(
-                 lambda c: c.tipo_curso != 'asignatura' and c.estado_universidad == 'publicado'
-             )
-        return response
-
-    def _slide_channel_all_values(self, slide_category=None, slug_tags=None, my=False, **post):
-        """ Sobrescribimos la obtención de datos para búsquedas JSON/AJAX y /slides/all """
-        values = super()._slide_channel_all_values(slide_category, slug_tags, my, **post)
-        
-        # FILTRO CENTRALIZADO: Ocultar asignaturas y no publicados
-        if values.get('channels'):
-            values['channels'] = values['channels'].filtered(
-                lambda c: c.tipo_curso != 'asignatura' and c.estado_universidad == 'publicado'
-            )
-            
-        return values
+        # El listado sale de la búsqueda del sitio web, ya filtrada en slide.channel._search_get_detail
+        return self._servir_catalogo_cacheado(lambda: super(UniversityWebsiteSlides, self).slides_channel_all(slide_type, my, **post))
         
     @http.route([
         '/slides/<model("slide.channel"):channel>',
@@ -82,6 +137,26 @@ class UniversityWebsiteSlides(WebsiteSlides):
 
 
 
+class _BufferZip(io.RawIOBase):
+    """ Destino no posicionable para zipfile: acumula lo escrito hasta que se vacía """
+
+    def __init__(self):
+        super().__init__()
+        self._bloques = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._bloques.append(bytes(data))
+        return len(data)
+
+    def vaciar(self):
+        data = b''.join(self._bloques)
+        self._bloques = []
+        return data
+
+
 class UniversitySlideController(http.Controller):
 
     @http.route('/slides/slide/upload_delivery', type='http', auth='user', methods=['POST'], website=True)
@@ -96,15 +171,17 @@ class UniversitySlideController(http.Controller):
         if not file:
             return request.redirect(slide.website_url)
 
-        # 3. Validar límite de tamaño (MB)
+        # 3. Validar límite de tamaño (MB): rechazo inmediato si la petición completa ya lo supera
         limit_mb = slide.channel_id.upload_limit_mb or 10
-        file_content = file.read()
-        if len(file_content) > limit_mb * 1024 * 1024:
+        limite_bytes = limit_mb * 1024 * 1024
+        error_tamano = {
             # Mostramos un error simple (podría mejorarse con notificaciones de Odoo)
-            return request.render('website.http_error', {
-                'status_code': _('Archivo demasiado grande'),
-                'status_message': _('El límite para este curso es de %s MB. Por favor, comprima el archivo e inténtelo de nuevo.') % limit_mb
-            })
+            'status_code': _('Archivo demasiado grande'),
+            'status_message': _('El límite para este curso es de %s MB. Por favor, comprima el archivo e inténtelo de nuevo.') % limit_mb
+        }
+        # Margen para el resto de campos del formulario multipart
+        if (request.httprequest.content_length or 0) > limite_bytes + 64 * 1024:
+            return request.render('website.http_error', error_tamano)
 
         # 4. Localizar o inicializar el registro de seguimiento slide.slide.partner
         # Usamos SUDO para asegurar que el registro se cree/actualice incluso si hay restricciones de escritura
@@ -113,25 +190,24 @@ class UniversitySlideController(http.Controller):
             ('partner_id', '=', request.env.user.partner_id.id)
         ], limit=1)
 
-        if not eval_record:
-            eval_record = request.env['slide.slide.partner'].sudo().create({
-                'slide_id': slide.id,
-                'partner_id': request.env.user.partner_id.id,
-                'channel_id': slide.channel_id.id,
-                'estado_evaluacion': 'pendiente_revision'
-            })
-
         # No permitir resubir si ya está evaluado y confirmado (seguridad extra)
         if eval_record.estado_evaluacion == 'evaluado':
             return request.redirect(slide.website_url)
 
-        # 5. Guardar el archivo y actualizar estado
-        eval_record.write({
-            'archivo_entrega': base64.b64encode(file_content) if file_content else False,
-            'nombre_archivo': file.filename,
-            'estado_evaluacion': 'pendiente_revision',
-            'fecha_entrega': fields.Datetime.now()
-        })
+        # 5. Guardar el archivo por bloques (comprobando antes su tamaño real) y actualizar estado
+        # Savepoint: si se supera el límite no queda ningún registro a medias
+        try:
+            with request.env.cr.savepoint():
+                if not eval_record:
+                    eval_record = request.env['slide.slide.partner'].sudo().create({
+                        'slide_id': slide.id,
+                        'partner_id': request.env.user.partner_id.id,
+                        'channel_id': slide.channel_id.id,
+                        'estado_evaluacion': 'pendiente_revision'
+                    })
+                eval_record._guardar_entrega(file.stream, file.filename, limite_bytes)
+        except ValidationError:
+            return request.render('website.http_error', error_tamano)
 
         # 6. Marcar como completado automáticamente (Check Verde)
         # Forzamos la escritura porque action_mark_completed() está bloqueado para evaluables
@@ -139,4 +215,88 @@ class UniversitySlideController(http.Controller):
 
         # 7. Redirigir de vuelta al contenido con un parámetro de éxito
         return request.redirect(slide.website_url + "?delivery_success=1")
-        
\ No newline at end of file
+        
+
+    @http.route('/universidad/entregas/<int:slide_id>/zip', type='http', auth='user')
+    def descargar_entregas_zip(self, slide_id, ids=None, **kw):
+        """ ZIP con todas las entregas de un entregable, generado en streaming (memoria constante) """
+        # 1. Entregas visibles para el usuario (las reglas de registro filtran por curso/autor)
+        slide = request.env['slide.slide'].browse(slide_id).exists()
+        if not slide or slide.slide_category != 'delivery':
+            raise NotFound()
+        domain = [('slide_id', '=', slide.id), ('attachment_entrega_id', '!=', False)]
+        if ids:
+            domain.append(('id', 'in', [int(i) for i in ids.split(',') if i.isdigit()]))
+        entregas = request.env['slide.slide.partner'].search(domain, order='partner_id, id')
+
+        # 2. Recogemos TODOS los metadatos antes de responder: el cursor de la petición se cierra
+        # mientras se envía la respuesta, así que el generador solo lee archivos.
+        Attachment = request.env['ir.attachment'].sudo()
+        estados = dict(entregas._fields['estado_evaluacion']._description_selection(request.env))
+        archivos = [] # (nombre en el zip, ruta en filestore o None, attachment_id)
+        manifiesto = io.StringIO()
+        writer = csv.writer(manifiesto)
+        writer.writerow(['alumno', 'email', 'archivo', 'fecha_entrega', 'estado_evaluacion', 'nota'])
+        usados = set()
+        for entrega in entregas.sudo():
+            adjunto = entrega.attachment_entrega_id
+            nombre = self._nombre_entrega_zip(entrega, usados)
+            ruta = Attachment._full_path(adjunto.store_fname) if adjunto.store_fname else None
+            archivos.append((nombre, ruta, adjunto.id))
+            writer.writerow([
+                entrega.partner_id.name,
+                entrega.partner_id.email or '',
+                nombre,
+                fields.Datetime.to_string(entrega.fecha_entrega) if entrega.fecha_entrega else '',
+                estados.get(entrega.estado_evaluacion, entrega.estado_evaluacion),
+                entrega.nota_evaluacion,
+            ])
+        manifiesto = manifiesto.getvalue().encode('utf-8-sig')
+        dbname = request.env.cr.dbname
+
+        nombre_zip = f"Entregas_{slide.channel_id.name}_{slide.name}.zip".replace(' ', '_')
+        return Response(
+            self._generar_zip_entregas(archivos, manifiesto, dbname),
+            headers=[
+                ('Content-Type', 'application/zip'),
+                ('Content-Disposition', content_disposition(nombre_zip)),
+            ],
+            direct_passthrough=True,
+        )
+
+    @staticmethod
+    def _nombre_entrega_zip(entrega, usados):
+        """ Nombre del archivo dentro del ZIP: <Alumno>_<archivo original>, sin colisiones """
+        alumno = re.sub(r'[^\w.-]+', '_', entrega.partner_id.name or 'alumno').strip('_')
+        original = os.path.basename(entrega.nombre_archivo or 'entrega')
+        nombre = f"{alumno}_{original}"
+        base, ext = os.path.splitext(nombre)
+        contador = 2
+        while nombre in usados:
+            nombre = f"{base}_{contador}{ext}"
+            contador += 1
+        usados.add(nombre)
+        return nombre
+
+    @staticmethod
+    def _generar_zip_entregas(archivos, manifiesto, dbname):
+        """ Genera el ZIP por bloques: cada bloque escrito por zipfile se entrega al cliente en cuanto existe """
+        buffer = _BufferZip()
+        with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+            zf.writestr('manifiesto.csv', manifiesto)
+            yield buffer.vaciar()
+            for nombre, ruta, attachment_id in archivos:
+                with zf.open(nombre, mode='w', force_zip64=True) as destino:
+                    if ruta:
+                        with open(ruta, 'rb') as origen:
+                            while bloque := origen.read(1024 * 1024):
+                                destino.write(bloque)
+                                yield buffer.vaciar()
+                    else:
+                        # Adjunto almacenado en base de datos: cursor propio (el de la petición ya está cerrado)
+                        with Registry(dbname).cursor() as cr:
+                            env = api.Environment(cr, SUPERUSER_ID, {})
+                            destino.write(env['ir.attachment'].browse(attachment_id).raw or b'')
+                yield buffer.vaciar()
+        yield buffer.vaciar()
+
@@ -47,7 +47,8 @@ class UniversityPortal(CustomerPortal):
         
         values.update({
             'date': date_begin,
-            'courses': courses,
+            # Árbol de notas precalculado (diccionarios): la plantilla no dispara consultas
+            'courses': SlideChannelPartner._get_arbol_notas_portal(courses),
             'page_name': 'grades',
             'pager': pager,
             'default_url': '/my/grades',
@@ -1,5 +1,8 @@
 from . import slide_channel
+from . import slide_channel_propagacion
+from . import slide_channel_emision
 from . import slide_slide
 from . import slide_gradebook
 from . import survey_survey
 from . import survey_user_input
+from . import res_users
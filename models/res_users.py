@@ -0,0 +1,22 @@
+from odoo import models, tools
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    # Rol de universidad -> grupo que lo otorga
+    ROLES_UNIVERSIDAD = {
+        'admin': 'elearning_universidad.grupo_administrador_universidad',
+        'director': 'elearning_universidad.grupo_director_academico',
+        'docente': 'elearning_universidad.grupo_personal_docente',
+        'sistema': 'base.group_system',
+    }
+
+    @tools.ormcache('self.id')
+    def _get_roles_universidad(self):
+        """ Roles de universidad del usuario (frozenset de claves de ROLES_UNIVERSIDAD).
+
+        Cacheado por usuario en el registro: Odoo vacía esta caché cuando cambian los
+        grupos de un usuario (res.users.groups_id) o la composición de un grupo (res.groups).
+        """
+        self.ensure_one()
+        return frozenset(rol for rol, grupo in self.ROLES_UNIVERSIDAD.items() if self.has_group(grupo))
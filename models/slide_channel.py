@@ -1,7 +1,12 @@
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError, AccessError
+from odoo.exceptions import ValidationError, AccessError, UserError
 from odoo.osv import expression
+from odoo.tools.sql import create_index
 from markupsafe import Markup
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
 
 class CanalSlide(models.Model):
     _inherit = 'slide.channel'
@@ -29,7 +34,7 @@ class CanalSlide(models.Model):
         # AÑADIR FILTROS:
         # 1. Ocultar Asignaturas (tipo_curso != asignatura)
         # 2. Ocultar No Publicados (estado_universidad == publicado)
-        filters = [('tipo_curso', '!=', 'asignatura'), ('estado_universidad', '=', 'publicado')]
+        filters = self._get_dominio_catalogo_publico()
         
         # Concatenación simple (Implicit AND)
         # IMPORTANTE: base_domain es una LISTA DE DOMINIOS (List[List[Tuple]]).
@@ -37,6 +42,46 @@ class CanalSlide(models.Model):
         search_details['base_domain'] = original_domain + [filters]
         return search_details
 
+    @api.model
+    def _get_dominio_catalogo_publico(self):
+        """ Filtro del catálogo web: sin Asignaturas y solo cursos publicados por la Universidad """
+        return [('tipo_curso', '!=', 'asignatura'), ('estado_universidad', '=', 'publicado')]
+
+    # Campos visibles en el catálogo web: su cambio invalida la caché de páginas del catálogo
+    CAMPOS_CATALOGO = [
+        'name', 'estado_universidad', 'is_published', 'website_published', 'active',
+        'tipo_curso', 'image_1920', 'precio_curso', 'description_short', 'tag_ids',
+    ]
+
+    @api.model
+    def _get_version_catalogo(self):
+        """ Versión del catálogo web (secuencia en BD, compartida entre workers).
+
+        Se usa (last_value, is_called): en una secuencia recién creada el primer nextval
+        devuelve el mismo last_value y solo cambia is_called.
+        """
+        self.env.cr.execute("SELECT last_value, is_called FROM slide_channel_version_catalogo_seq")
+        return tuple(self.env.cr.fetchone())
+
+    @api.model
+    def _invalidar_cache_catalogo(self):
+        """ Incrementa la versión del catálogo tras el commit: las páginas cacheadas dejan de servirse en todos los workers.
+
+        Es un contador propio (no un ir.config_parameter) para no vaciar la caché del registro en
+        cada escritura. Se incrementa después del commit para que ningún worker guarde con la versión
+        nueva una página renderizada con los datos anteriores; una vez por transacción.
+        """
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get('universidad_version_catalogo'):
+            return
+        postcommit.data['universidad_version_catalogo'] = True
+        registry = self.env.registry
+
+        @postcommit.add
+        def _incrementar_version():
+            with registry.cursor() as cr:
+                cr.execute("SELECT nextval('slide_channel_version_catalogo_seq')")
+
     # --- Acceso Campo Core Restringido ---
     # Odoo restringe channel_partner_ids a Officer. Ampliamos acceso.
     channel_partner_ids = fields.One2many(
@@ -89,9 +134,10 @@ class CanalSlide(models.Model):
     @api.depends_context('uid')
     def _compute_security_fields(self):
         user = self.env.user
-        is_admin = user.has_group('elearning_universidad.grupo_administrador_universidad')
-        is_director_group = user.has_group('elearning_universidad.grupo_director_academico')
-        is_teacher_group = user.has_group('elearning_universidad.grupo_personal_docente')
+        roles = user._get_roles_universidad()
+        is_admin = 'admin' in roles
+        is_director_group = 'director' in roles
+        is_teacher_group = 'docente' in roles
         
         for record in self:
             # Detectar si el usuario es Director de ESTE curso específico
@@ -133,6 +179,7 @@ class CanalSlide(models.Model):
     def _compute_can_upload(self):
         """ Controla quién puede crear contenido en el curso """
         super()._compute_can_upload()
+        is_admin = 'admin' in self.env.user._get_roles_universidad()
         for record in self:
             if record.can_upload:
                 continue
@@ -141,13 +188,14 @@ class CanalSlide(models.Model):
             user_id = self.env.uid
             if (user_id in record.director_academico_ids.ids or 
                 user_id in record.personal_docente_ids.ids or 
-                self.env.user.has_group('elearning_universidad.grupo_administrador_universidad')):
+                is_admin):
                 record.can_upload = True
 
     @api.depends('user_id', 'director_academico_ids', 'personal_docente_ids')
     def _compute_can_publish(self):
         """ Controla quién puede publicar contenido en el curso """
         super()._compute_can_publish()
+        is_admin = 'admin' in self.env.user._get_roles_universidad()
         for record in self:
             if record.can_publish:
                 continue
@@ -156,7 +204,7 @@ class CanalSlide(models.Model):
             user_id = self.env.uid
             if (user_id in record.director_academico_ids.ids or 
                 user_id in record.personal_docente_ids.ids or
-                self.env.user.has_group('elearning_universidad.grupo_administrador_universidad')):
+                is_admin):
                 record.can_publish = True
 
     # --- Roles Académicos --- 
@@ -234,6 +282,38 @@ class CanalSlide(models.Model):
         default='modern_gold'
     )
 
+    # --- Propagación de matrículas en segundo plano ---
+    UMBRAL_PROPAGACION_SINCRONA = 100 # Alumnos por encima de los cuales la propagación se encola
+
+    propagaciones_pendientes = fields.Integer(
+        string='Propagaciones Pendientes',
+        compute='_compute_propagaciones_pendientes',
+        help="Altas/bajas de alumnos Master -> Asignatura aún en cola."
+    )
+    propagaciones_error = fields.Integer(
+        string='Propagaciones con Error',
+        compute='_compute_propagaciones_pendientes',
+        help="Altas/bajas de alumnos Master -> Asignatura que fallaron y esperan un reintento."
+    )
+
+    def _compute_propagaciones_pendientes(self):
+        contadores = {estado: dict.fromkeys(self.ids, 0) for estado in ('pendiente', 'error')}
+        Propagacion = self.env['slide.channel.propagacion'].sudo()
+        for campo in ('channel_id', 'master_id'):
+            for channel, estado, count in Propagacion._read_group(
+                [('estado', 'in', ['pendiente', 'en_curso', 'error']), (campo, 'in', self.ids)],
+                groupby=[campo, 'estado'], aggregates=['__count']
+            ):
+                # En curso cuenta como pendiente: se procesará sin intervención
+                contadores['error' if estado == 'error' else 'pendiente'][channel.id] += count
+        for record in self:
+            record.propagaciones_pendientes = contadores['pendiente'].get(record.id, 0)
+            record.propagaciones_error = contadores['error'].get(record.id, 0)
+
+    # Survey "wrapper" sobre el que se emiten los títulos del curso (creado bajo demanda)
+    survey_titulo_id = fields.Many2one('survey.survey', string='Encuesta del Título', readonly=True, copy=False)
+    pregunta_titulo_id = fields.Many2one('survey.question', string='Pregunta del Título', readonly=True, copy=False)
+
     politica_emision = fields.Selection([
         ('automatica', 'Automática (al cerrar acta)'),
         ('manual', 'Manual (requiere validación)')
@@ -243,29 +323,174 @@ class CanalSlide(models.Model):
     # --- Campo para OPTIMIZAR REGLAS DE SEGURIDAD ---
     # Este campo almacena TODOS los docentes vinculados a este curso (directos + heredados de asignaturas)
     # Permite simplificar las reglas de registro y evitar joins complejos o recursiones.
+    # Se mantiene de forma INCREMENTAL por SQL (_sincronizar_all_personal_docente): solo se insertan/borran
+    # las filas (curso, docente) que cambian, en lugar de reescribir la relación del Master y sus asignaturas.
     all_personal_docente_ids = fields.Many2many(
         'res.users',
         'slide_channel_all_docentes_rel',
         'channel_id', 'user_id',
         string='Todos los Docentes (Calculado)',
-        compute='_compute_all_personal_docente_ids',
-        store=True,
-        compute_sudo=True
+        readonly=True,
+        copy=False
     )
 
-    @api.depends('personal_docente_ids', 'asignatura_ids.personal_docente_ids', 'master_id.personal_docente_ids')
-    def _compute_all_personal_docente_ids(self):
-        for record in self:
-            docentes = record.personal_docente_ids
-            # Si es Master, incluimos los docentes de sus asignaturas
-            if record.tipo_curso == 'master':
-                docentes |= record.asignatura_ids.mapped('personal_docente_ids')
-            
-            # Si es Asignatura, incluimos los docentes del Master (Visibilidad Ascendente)
-            if record.master_id:
-                docentes |= record.master_id.personal_docente_ids
+    # Índice materializado usuario -> cursos accesibles (directores + todos los docentes).
+    # Las reglas de registro lo usan como una única búsqueda indexada en lugar de varios joins.
+    acceso_user_ids = fields.Many2many(
+        'res.users',
+        'slide_channel_acceso_rel',
+        'channel_id', 'user_id',
+        string='Usuarios con Acceso (Calculado)',
+        readonly=True,
+        copy=False
+    )
+
+    def init(self):
+        super().init()
+        # Contador de versión del catálogo web (caché de páginas de controllers/main.py)
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS slide_channel_version_catalogo_seq")
+        # Índice parcial de la cola de publicación programada (_cron_publicar_cursos_programados)
+        create_index(
+            self.env.cr, 'slide_channel_programado_fecha_idx', self._table,
+            ['fecha_programada_publicacion'], where="estado_universidad = 'programado'"
+        )
+        # Relleno inicial del índice de acceso (idempotente)
+        self.env.cr.execute("""
+            INSERT INTO slide_channel_acceso_rel (channel_id, user_id)
+            SELECT channel_id, user_id FROM slide_channel_director_rel
+            UNION
+            SELECT channel_id, user_id FROM slide_channel_all_docentes_rel
+            ON CONFLICT DO NOTHING
+        """)
+
+    # Campos de los que depende all_personal_docente_ids
+    CAMPOS_ALL_PERSONAL_DOCENTE = ['personal_docente_ids', 'master_id', 'tipo_curso', 'active']
+
+    # Pares (curso, docente) esperados para los cursos de %(ids)s:
+    #   docentes propios + docentes de sus asignaturas activas (Master) + docentes de su Master (Asignatura)
+    _SQL_OBJETIVO_DOCENTES = """
+        SELECT d.channel_id, d.user_id
+          FROM slide_channel_docente_rel d
+         WHERE d.channel_id = ANY(%(ids)s)
+        UNION
+        SELECT a.master_id, d.user_id
+          FROM slide_channel a
+          JOIN slide_channel m ON m.id = a.master_id AND m.tipo_curso = 'master'
+          JOIN slide_channel_docente_rel d ON d.channel_id = a.id
+         WHERE a.master_id = ANY(%(ids)s) AND a.tipo_curso = 'asignatura' AND a.active
+        UNION
+        SELECT c.id, d.user_id
+          FROM slide_channel c
+          JOIN slide_channel_docente_rel d ON d.channel_id = c.master_id
+         WHERE c.id = ANY(%(ids)s)
+    """
+
+    # Pares (curso, usuario) con acceso de staff: directores + todos los docentes (propios y heredados)
+    _SQL_OBJETIVO_ACCESO = """
+        SELECT channel_id, user_id FROM slide_channel_director_rel WHERE channel_id = ANY(%(ids)s)
+        UNION
+        SELECT channel_id, user_id FROM slide_channel_all_docentes_rel WHERE channel_id = ANY(%(ids)s)
+    """
+
+    def _sincronizar_relacion(self, tabla, sql_objetivo):
+        """ Aplica sobre la relación (channel_id, user_id) de 'tabla' la diferencia con los pares
+        esperados (sql_objetivo) para los cursos de self, en una sola sentencia. Devuelve los ids modificados.
+        """
+        self.env.cr.execute(f"""
+            WITH objetivo AS ({sql_objetivo}),
+            borrados AS (
+                DELETE FROM {tabla} r
+                 WHERE r.channel_id = ANY(%(ids)s)
+                   AND NOT EXISTS (
+                       SELECT 1 FROM objetivo o WHERE o.channel_id = r.channel_id AND o.user_id = r.user_id
+                   )
+             RETURNING r.channel_id
+            ),
+            insertados AS (
+                INSERT INTO {tabla} (channel_id, user_id)
+                SELECT channel_id, user_id FROM objetivo
+                    ON CONFLICT DO NOTHING
+             RETURNING channel_id
+            )
+            SELECT channel_id FROM borrados
+             UNION
+            SELECT channel_id FROM insertados
+        """, {'ids': self.ids})
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def _sincronizar_all_personal_docente(self):
+        """ Actualiza all_personal_docente_ids (y acceso_user_ids) de los cursos afectados por un cambio
+        en self (el propio curso, su Master y sus asignaturas). Devuelve los cursos modificados.
+        """
+        cursos = self.exists()
+        cursos = cursos | cursos.master_id | cursos.with_context(active_test=False).asignatura_ids
+        if not cursos:
+            return self.browse()
+        self.flush_model(self.CAMPOS_ALL_PERSONAL_DOCENTE)
+
+        # 1. Diferencia entre lo esperado y lo almacenado, aplicada en una sola sentencia
+        modificados = self.browse(cursos._sincronizar_relacion('slide_channel_all_docentes_rel', self._SQL_OBJETIVO_DOCENTES))
+
+        # 2. Invalidamos la caché y recalculamos lo que depende del campo (nombres visibles)
+        if modificados:
+            self.invalidate_model(['all_personal_docente_ids'])
+            self.env.add_to_compute(self._fields['personal_docente_names'], modificados)
+            self.env.add_to_compute(self._fields['director_academico_names'], modificados)
+            modificados._sincronizar_acceso_usuarios()
+        return modificados
+
+    def _sincronizar_acceso_usuarios(self):
+        """ Actualiza acceso_user_ids (índice usuario -> cursos de las reglas de seguridad) de self """
+        cursos = self.exists()
+        if not cursos:
+            return self.browse()
+        self.flush_model(['director_academico_ids'])
+        modificados = self.browse(cursos._sincronizar_relacion('slide_channel_acceso_rel', self._SQL_OBJETIVO_ACCESO))
+        if modificados:
+            self.invalidate_model(['acceso_user_ids'])
+        return modificados
 
-            record.all_personal_docente_ids = docentes
+    @api.model
+    def _verificar_all_personal_docente(self, reparar=False):
+        """ Comprueba (y opcionalmente repara) all_personal_docente_ids de todos los cursos.
+        Devuelve {'faltantes': n, 'sobrantes': n} con el estado previo a la reparación.
+        """
+        self.flush_model(self.CAMPOS_ALL_PERSONAL_DOCENTE + ['all_personal_docente_ids'])
+        cursos = self.sudo().with_context(active_test=False).search([])
+        self.env.cr.execute(f"""
+            WITH objetivo AS ({self._SQL_OBJETIVO_DOCENTES})
+            SELECT
+                (SELECT COUNT(*) FROM objetivo o
+                  WHERE NOT EXISTS (SELECT 1 FROM slide_channel_all_docentes_rel r
+                                     WHERE r.channel_id = o.channel_id AND r.user_id = o.user_id)),
+                (SELECT COUNT(*) FROM slide_channel_all_docentes_rel r
+                  WHERE NOT EXISTS (SELECT 1 FROM objetivo o
+                                     WHERE o.channel_id = r.channel_id AND o.user_id = r.user_id))
+        """, {'ids': cursos.ids})
+        faltantes, sobrantes = self.env.cr.fetchone()
+        resultado = {'faltantes': faltantes, 'sobrantes': sobrantes}
+        if faltantes or sobrantes:
+            _logger.warning("all_personal_docente_ids inconsistente: %(faltantes)s filas faltantes, %(sobrantes)s sobrantes", resultado)
+        if reparar:
+            cursos._sincronizar_all_personal_docente()
+            # acceso_user_ids depende también de los directores: se reconstruye para todos los cursos
+            cursos._sincronizar_acceso_usuarios()
+        return resultado
+
+    def action_verificar_all_personal_docente(self):
+        """ Acción de administración: verifica y reconstruye la relación de docentes """
+        if 'admin' not in self.env.user._get_roles_universidad():
+            raise AccessError(_("Solo los Administradores de Universidad pueden reconstruir los permisos de docentes."))
+        resultado = self._verificar_all_personal_docente(reparar=True)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Permisos de Docentes'),
+                'message': _("Filas faltantes: %(faltantes)s. Filas sobrantes: %(sobrantes)s. Relación reconstruida.") % resultado,
+                'type': 'success' if not (resultado['faltantes'] or resultado['sobrantes']) else 'warning',
+            }
+        }
 
     # --- Campos de Visualización (Text Strings) para evitar problemas de ACL en Vistas ---
     director_academico_names = fields.Char(string='Directores (Texto)', compute='_compute_staff_names', compute_sudo=True, store=True)
@@ -273,34 +498,39 @@ class CanalSlide(models.Model):
 
     @api.depends('director_academico_ids', 'master_id.director_academico_ids', 'all_personal_docente_ids')
     def _compute_staff_names(self):
+        # DIRECTORES: Bypass ORM/Domain filtering using explicit SQL to guarantee simple display visibility
+        # This ensures that if a user is linked in the DB, they show up, even if they lost the 'group' required by the domain.
+        # Una sola consulta para todos los cursos del lote y sus Masters.
+        stored_records = self.filtered(lambda r: isinstance(r.id, int))
+        canal_ids = set(stored_records.ids) | set(stored_records.master_id.ids)
+        directores_por_canal = {}
+        if canal_ids:
+            self.flush_model(['director_academico_ids'])
+            self.env.cr.execute(
+                "SELECT channel_id, user_id FROM slide_channel_director_rel WHERE channel_id = ANY(%s)",
+                [list(canal_ids)]
+            )
+            for channel_id, user_id in self.env.cr.fetchall():
+                directores_por_canal.setdefault(channel_id, set()).add(user_id)
+
+        # Nombres de todos los usuarios implicados (directores y docentes) en una sola lectura
+        user_ids = set().union(*directores_por_canal.values(), self.all_personal_docente_ids.ids)
+        nombres = {user.id: user.name for user in self.env['res.users'].sudo().browse(sorted(user_ids))}
+
         for record in self:
-            # DIRECTORES: Bypass ORM/Domain filtering using explicit SQL to guarantee simple display visibility
-            # This ensures that if a user is linked in the DB, they show up, even if they lost the 'group' required by the domain.
-            dir_ids = set()
-            try:
-                # 1. Direct fetch from relation table for this channel
-                self.env.cr.execute("SELECT user_id FROM slide_channel_director_rel WHERE channel_id = %s", (record.id,))
-                dir_ids.update(row[0] for row in self.env.cr.fetchall())
-                
-                # 2. If it's an Asignatura (with Master), fetch from Master
-                if record.master_id:
-                    self.env.cr.execute("SELECT user_id FROM slide_channel_director_rel WHERE channel_id = %s", (record.master_id.id,))
-                    dir_ids.update(row[0] for row in self.env.cr.fetchall())
-                
-                if dir_ids:
-                    # Browse as sudo to read names
-                    directors = self.env['res.users'].sudo().browse(list(dir_ids))
-                    record.director_academico_names = ', '.join(directors.mapped('name'))
-                else:
-                    record.director_academico_names = ''
-            except Exception:
-                # Safe fallback to ORM if table doesn't exist yet (in memory)
-                # But logic dictates we stick to robust display.
-                # Just fallback to empty if crash.
-                record.director_academico_names = ''
+            if isinstance(record.id, int):
+                # 2. Si es Asignatura (con Master), incluimos los directores del Master
+                dir_ids = directores_por_canal.get(record.id, set()) | directores_por_canal.get(record.master_id.id, set())
+                record.director_academico_names = ', '.join(nombres[user_id] for user_id in sorted(dir_ids))
+            else:
+                # Registro en memoria (onchange / NewId): leemos la caché del ORM
+                directores = record.director_academico_ids | record.master_id.director_academico_ids
+                record.director_academico_names = ', '.join(directores.sudo().mapped('name'))
 
             # DOCENTES: Keep ORM logic as it was working fine
-            record.personal_docente_names = ', '.join(record.all_personal_docente_ids.mapped('name'))
+            record.personal_docente_names = ', '.join(
+                nombres.get(user.id) or user.sudo().name for user in record.all_personal_docente_ids
+            )
 
     # --- Computes de Lógica Académica ---
     @api.depends('slide_ids.completion_time', 'master_id.slide_ids.completion_time', 'tipo_curso')
@@ -355,21 +585,29 @@ class CanalSlide(models.Model):
         """ 
         Automatización: Cuando una Asignatura se vincula a un Master,
         creamos/actualizamos su representación como Slide (contenido) en ese Master.
+        Funciona por lotes: una búsqueda para todo el lote y una escritura por cada
+        conjunto de cambios idéntico (publicar N asignaturas = una sola escritura).
         """
         Slide = self.env['slide.slide'].sudo()
-        for curso in self:
-            if curso.tipo_curso == 'asignatura' and curso.master_id:
-                # RECURSION STOPPER: Check if we are reacting to a change from the Slide side
-                if self.env.context.get('avoid_recursive_sync'):
-                    continue
-
-                # 1. Buscamos si ya existe el slide en el Master
-                slide_existente = Slide.search([
-                    ('channel_id', '=', curso.master_id.id),
-                    ('asignatura_id', '=', curso.id),
-                    ('slide_category', '=', 'sub_course')
-                ], limit=1)
+        # RECURSION STOPPER: Check if we are reacting to a change from the Slide side
+        if self.env.context.get('avoid_recursive_sync'):
+            vinculadas = self.browse()
+        else:
+            vinculadas = self.filtered(lambda c: c.tipo_curso == 'asignatura' and c.master_id)
+
+        if vinculadas:
+            # 1. Slides ya existentes en los Masters (una sola búsqueda)
+            slides_existentes = {}
+            for slide in Slide.search([
+                ('channel_id', 'in', vinculadas.master_id.ids),
+                ('asignatura_id', 'in', vinculadas.ids),
+                ('slide_category', '=', 'sub_course')
+            ]):
+                slides_existentes.setdefault((slide.channel_id.id, slide.asignatura_id.id), slide)
 
+            escrituras = {}
+            vals_creacion = []
+            for curso in vinculadas:
                 vals_slide = {
                     'name': curso.name,
                     'channel_id': curso.master_id.id,
@@ -380,24 +618,34 @@ class CanalSlide(models.Model):
                     'sequence': 100 # Por defecto al final
                 }
 
+                slide_existente = slides_existentes.get((curso.master_id.id, curso.id))
                 if slide_existente:
-                    # Usamos SUDO y contexto para evitar el envío de correos automáticos "Nuevo contenido publicado"
-                    # al sincronizar la asignatura. PASAMOS EL FLAG para que el slide no intente escribir de vuelta en nosotros.
-                    slide_existente.sudo().with_context(mail_notrack=True, mail_create_nosubscribe=True, avoid_recursive_sync=True).write(vals_slide)
+                    # Canal, categoría y asignatura ya coinciden (son la clave de búsqueda): sólo comparamos el resto
+                    cambios = frozenset(
+                        (campo, valor) for campo, valor in vals_slide.items()
+                        if campo in ('name', 'is_published', 'es_evaluable', 'sequence') and slide_existente[campo] != valor
+                    )
+                    if cambios:
+                        escrituras[cambios] = escrituras.get(cambios, Slide) | slide_existente
                 else:
-                    Slide.with_context(automation_create=True, mail_notrack=True, mail_create_nosubscribe=True, avoid_recursive_sync=True).create(vals_slide)
+                    vals_creacion.append(vals_slide)
+
+            # Usamos SUDO y contexto para evitar el envío de correos automáticos "Nuevo contenido publicado"
+            # al sincronizar la asignatura. PASAMOS EL FLAG para que el slide no intente escribir de vuelta en nosotros.
+            for cambios, slides in escrituras.items():
+                slides.with_context(mail_notrack=True, mail_create_nosubscribe=True, avoid_recursive_sync=True).write(dict(cambios))
+            if vals_creacion:
+                Slide.with_context(automation_create=True, mail_notrack=True, mail_create_nosubscribe=True, avoid_recursive_sync=True).create(vals_creacion)
             
-            # Limpieza: Si cambió de master o dejó de ser asignatura (improbable por inmutabilidad),
-            # deberíamos borrar los slides antiguos que apunten a este curso pero estén en otros masters.
-            slides_huerfanos = Slide.search([
-                ('asignatura_id', '=', curso.id),
-                ('slide_category', '=', 'sub_course')
-            ])
-            if curso.master_id:
-                slides_huerfanos = slides_huerfanos.filtered(lambda s: s.channel_id != curso.master_id)
-            
-            if slides_huerfanos:
-                slides_huerfanos.unlink()
+        # Limpieza: Si cambió de master o dejó de ser asignatura (improbable por inmutabilidad),
+        # deberíamos borrar los slides antiguos que apunten a este curso pero estén en otros masters.
+        slides_huerfanos = Slide.search([
+            ('asignatura_id', 'in', self.ids),
+            ('slide_category', '=', 'sub_course')
+        ]).filtered(lambda s: s.channel_id != s.asignatura_id.master_id)
+        
+        if slides_huerfanos:
+            slides_huerfanos.unlink()
 
     # --- Acciones de Workflow (Estados) con Validaciones ---
 
@@ -432,29 +680,69 @@ class CanalSlide(models.Model):
         text_color = text_colors.get(tipo, '#000')
         icon = icons.get(tipo, 'info-circle')
         
-        return Markup(f"""
+        # format() escapa los textos planos; los mensajes con HTML propio llegan como Markup
+        return Markup("""
             <div style="background-color: {bg_color}; color: {text_color}; padding: 15px; border-radius: 5px; border-left: 5px solid {text_color}; margin-bottom: 10px;">
                 <h5 style="margin: 0; font-weight: bold; display: flex; align-items: center;">
                     <i class="fa fa-{icon}" style="margin-right: 10px;"></i> {titulo}
                 </h5>
                 <p style="margin: 5px 0 0 0; font-size: 14px;">{mensaje}</p>
             </div>
-        """)
+        """).format(bg_color=bg_color, text_color=text_color, icon=icon, titulo=titulo, mensaje=mensaje)
 
-    def _notificar_administradores(self, titulo, mensaje, tipo='info'):
-        """ Notifica a todos los administradores de la universidad """
+    def _get_partners_administradores(self):
+        """ Partners de los administradores de la universidad """
         grupo_admin = self.env.ref('elearning_universidad.grupo_administrador_universidad')
-        admins = grupo_admin.users.mapped('partner_id')
-        
+        return grupo_admin.users.mapped('partner_id')
+
+    def _notificar_administradores(self, titulo, mensaje, tipo='info', por_curso=False):
+        """ Notifica a todos los administradores de la universidad """
+        self._publicar_notificacion(titulo, mensaje, tipo, por_curso=por_curso, avisar_admins=True)
+
+    def _publicar_notificacion(self, titulo, mensaje, tipo='info', por_curso=False, avisar_admins=False):
+        """ Publica la misma notificación en el chatter de todos los cursos del lote.
+
+        El HTML se genera una sola vez por lote; con `por_curso` el '%s' del mensaje se
+        sustituye (escapado) por el nombre de cada curso. Los correos se encolan para el
+        CRON de correo en lugar de enviarse dentro de la transacción.
+        Con `avisar_admins` los administradores reciben un único resumen con los cursos
+        afectados (ver _enviar_resumen_administradores), sea un curso suelto o un lote.
+        """
+        if not self:
+            return
         html_body = self._format_notification_html(titulo, mensaje, tipo)
-        
-        for record in self:
+
+        for record in self.with_context(mail_notify_force_send=False):
             record.message_post(
-                body=html_body,
-                partner_ids=admins.ids,
-                message_type='notification'
+                body=html_body % record.name if por_curso else html_body,
+                message_type='notification',
+                # Los avisos a administradores no van a los seguidores (nota interna)
+                subtype_xmlid='mail.mt_note' if avisar_admins else 'mail.mt_comment'
             )
 
+        if avisar_admins:
+            self._enviar_resumen_administradores(titulo, tipo)
+
+    def _enviar_resumen_administradores(self, titulo, tipo='info'):
+        """ Envía a los administradores un único mensaje con los cursos de una transición (uno o varios) """
+        admins = self._get_partners_administradores()
+        if not self or not admins:
+            return
+        lista = Markup('<ul>%s</ul>') % Markup().join(
+            Markup('<li>%s</li>') % nombre for nombre in self.mapped('name')
+        )
+        html_body = self._format_notification_html(
+            titulo,
+            _("Cursos afectados: %s") % len(self),
+            tipo
+        ) + lista
+        # message_notify no deja rastro en el chatter del curso: sólo llega a la bandeja de los admins
+        self[:1].with_context(mail_notify_force_send=False).message_notify(
+            partner_ids=admins.ids,
+            subject=titulo,
+            body=html_body
+        )
+
     def _sincronizar_seguidores_staff(self):
         """ 
         Agrega a Directores y Docentes como seguidores del curso (Chatter)
@@ -468,44 +756,90 @@ class CanalSlide(models.Model):
     @api.constrains('estado_universidad')
     def _check_requisitos_publicacion(self):
         """ Validaciones críticas antes de publicar o programar """
+        # Una sola validación en bloque para todos los cursos escritos
+        self.filtered(
+            lambda r: r.estado_universidad in ['programado', 'publicado']
+        )._validar_requisitos_publicacion()
+
+    def _validar_requisitos_publicacion(self):
+        """ Comprueba en bloque que los cursos pueden programarse o publicarse (informa de todos los fallos) """
+        infracciones = self._get_infracciones_publicacion()
+        if infracciones:
+            raise ValidationError("\n".join(
+                mensaje for mensajes in infracciones.values() for mensaje in mensajes
+            ))
+
+    def _get_infracciones_publicacion(self):
+        """ Requisitos de publicación incumplidos por cada curso del lote: {channel_id: [mensajes]}.
+
+        No escribe nada y hace un número constante de consultas: la duración de las asignaturas
+        sale de un solo _read_group y los directores (propios y del Master) se precargan para todo
+        el lote. Una asignatura sin directores cuyo Master sí los tiene es válida: los hereda al
+        programarse o publicarse (ver _heredar_directores_master).
+        """
+        asignaturas = self.filtered(lambda r: r.tipo_curso == 'asignatura')
+        duraciones = {}
+        if asignaturas:
+            duraciones = {
+                asignatura.id: duracion
+                for asignatura, duracion in self.env['slide.slide']._read_group(
+                    [('asignatura_id', 'in', asignaturas.ids), ('slide_category', '=', 'sub_course')],
+                    ['asignatura_id'], ['completion_time:max']
+                )
+            }
+
+        infracciones = {}
         for record in self:
-            if record.estado_universidad in ['programado', 'publicado']:
-                # 1. Director Académico Obligatorio (Master/Micro)
-                # Para asignaturas lo heredamos, así que verificamos que el Master lo tenga
-                if record.tipo_curso in ['master', 'microcredencial']:
-                    if not record.director_academico_ids:
-                        raise ValidationError(f"El curso '{record.name}' debe tener asignado al menos un Director Académico.")
-                
-                # 2. Master Obligatorio (Asignatura)
-                if record.tipo_curso == 'asignatura':
-                    if not record.master_id:
-                        raise ValidationError(f"La asignatura '{record.name}' debe pertenecer a un Master para ser publicada.")
-                    # Verificación indirecta: si el master no tiene director, la asignatura tampoco lo tendrá
-                    if not record.director_academico_ids:
-                         # Intentamos recuperar del master si falla
-                         if record.master_id.director_academico_ids:
-                             record.director_academico_ids = record.master_id.director_academico_ids
-                         else:
-                             raise ValidationError(f"El Master vinculado a la asignatura '{record.name}' no tiene Director Académico asignado.")
-
-                # 3. Precio Obligatorio (Si es de pago)
-                if record.enroll == 'payment' and record.precio_curso <= 0:
-                     raise ValidationError(f"El curso '{record.name}' está configurado como 'De Pago' pero el precio es 0.00.")
-
-                # 4. Plantilla de Título (Si emite título)
-                if record.tiene_titulo and not record.plantilla_titulo:
-                    raise ValidationError(f"El curso '{record.name}' emite título pero no tiene seleccionada ninguna Plantilla.")
-
-                # 5. Duración de Asignatura (Requisito Académico)
-                # CAMBIO: Usamos ESTRICTAMENTE la duración definida en la ficha del Master (Slide), no el contenido interno.
-                if record.tipo_curso == 'asignatura':
-                   master_slide = self.env['slide.slide'].search([
-                        ('asignatura_id', '=', record.id),
-                        ('slide_category', '=', 'sub_course')
-                    ], limit=1)
-                    
-                   if not master_slide or master_slide.completion_time <= 0:
-                        raise ValidationError(f"La asignatura '{record.name}' debe tener una duración mayor a 0 horas definida en el Master para ser publicada.")
+            mensajes = []
+            # 1. Director Académico Obligatorio (Master/Micro)
+            if record.tipo_curso in ['master', 'microcredencial']:
+                if not record.director_academico_ids:
+                    mensajes.append(f"El curso '{record.name}' debe tener asignado al menos un Director Académico.")
+            
+            # 2. Master Obligatorio (Asignatura)
+            if record.tipo_curso == 'asignatura':
+                if not record.master_id:
+                    mensajes.append(f"La asignatura '{record.name}' debe pertenecer a un Master para ser publicada.")
+                # Verificación indirecta: si el master no tiene director, la asignatura tampoco lo tendrá
+                elif not record.director_academico_ids and not record.master_id.director_academico_ids:
+                    mensajes.append(f"El Master vinculado a la asignatura '{record.name}' no tiene Director Académico asignado.")
+
+            # 3. Precio Obligatorio (Si es de pago)
+            if record.enroll == 'payment' and record.precio_curso <= 0:
+                 mensajes.append(f"El curso '{record.name}' está configurado como 'De Pago' pero el precio es 0.00.")
+
+            # 4. Plantilla de Título (Si emite título)
+            if record.tiene_titulo and not record.plantilla_titulo:
+                mensajes.append(f"El curso '{record.name}' emite título pero no tiene seleccionada ninguna Plantilla.")
+
+            # 5. Duración de Asignatura (Requisito Académico)
+            # CAMBIO: Usamos ESTRICTAMENTE la duración definida en la ficha del Master (Slide), no el contenido interno.
+            if record.tipo_curso == 'asignatura' and (duraciones.get(record.id) or 0) <= 0:
+                mensajes.append(f"La asignatura '{record.name}' debe tener una duración mayor a 0 horas definida en el Master para ser publicada.")
+
+            if mensajes:
+                infracciones[record.id] = mensajes
+        return infracciones
+
+    def _heredar_directores_master(self):
+        """ Copia los directores del Master a las asignaturas que no tienen (una escritura por Master) """
+        sin_director = self.filtered(
+            lambda r: r.tipo_curso == 'asignatura' and r.master_id.director_academico_ids and not r.director_academico_ids
+        )
+        for master, asignaturas in sin_director.grouped('master_id').items():
+            asignaturas.write({'director_academico_ids': [(6, 0, master.director_academico_ids.ids)]})
+
+    def action_informe_publicacion(self):
+        """ Acción de administración: informe previo con todos los requisitos de publicación incumplidos, por curso """
+        wizard = self.env['slide.channel.publicacion.informe.wizard'].create({'channel_ids': [(6, 0, self.ids)]})
+        return {
+            'name': _('Requisitos de Publicación'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'slide.channel.publicacion.informe.wizard',
+            'res_id': wizard.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
 
     @api.onchange('master_id')
     def _onchange_master_id_directores(self):
@@ -521,40 +855,40 @@ class CanalSlide(models.Model):
             
             if record.estado_universidad != 'borrador':
                 raise ValidationError("Solo se pueden presentar cursos en estado Borrador.")
-            record.estado_universidad = 'presentado'
-            record._notificar_administradores(
-                _("Nuevo curso presentado"), 
-                _("El curso '%s' ha sido presentado para revisión.") % record.name,
-                tipo='info'
-            )
+        self.write({'estado_universidad': 'presentado'})
+        self._notificar_administradores(
+            _("Nuevo curso presentado"), 
+            _("El curso '%s' ha sido presentado para revisión."),
+            tipo='info',
+            por_curso=True
+        )
 
     def action_rechazar(self, motivo):
-        if not self.env.user.has_group('elearning_universidad.grupo_administrador_universidad'):
+        if 'admin' not in self.env.user._get_roles_universidad():
             raise ValidationError("Solo un Administrador de Universidad puede rechazar cursos.")
-        for record in self:
-            record.write({
-                'estado_universidad': 'rechazado',
-                'motivo_rechazo': motivo
-            })
-            # Notificación de Rechazo con Motivo
-            html_body = record._format_notification_html(
-                _("Curso Rechazado"),
-                _("El curso ha sido rechazado por el Administrador.<br/><strong>Motivo:</strong> %s") % motivo,
-                tipo='danger'
-            )
-            record.message_post(body=html_body, subtype_xmlid='mail.mt_comment')
+        self.write({
+            'estado_universidad': 'rechazado',
+            'motivo_rechazo': motivo
+        })
+        # Notificación de Rechazo con Motivo
+        self._publicar_notificacion(
+            _("Curso Rechazado"),
+            Markup(_("El curso ha sido rechazado por el Administrador.<br/><strong>Motivo:</strong> %s")) % motivo,
+            tipo='danger'
+        )
 
     def action_subsanar(self):
         """ Equivale a volver a presentar tras un rechazo """
         for record in self:
             if record.estado_universidad != 'rechazado':
                 raise ValidationError("Solo se pueden subsanar cursos rechazados.")
-            record.estado_universidad = 'subsanacion'
-            record._notificar_administradores(
-                _("Curso subsanado"), 
-                _("El curso '%s' ha sido re-presentado tras subsanación.") % record.name,
-                tipo='warning'
-            )
+        self.write({'estado_universidad': 'subsanacion'})
+        self._notificar_administradores(
+            _("Curso subsanado"), 
+            _("El curso '%s' ha sido re-presentado tras subsanación."),
+            tipo='warning',
+            por_curso=True
+        )
 
     def action_confirmar_programacion(self):
         """ Wrapper para botón de vista: Lee fecha del formulario y llama a acción lógica """
@@ -564,88 +898,83 @@ class CanalSlide(models.Model):
             record.action_programar(record.fecha_programada_publicacion)
 
     def action_programar(self, fecha):
-        if not self.env.user.has_group('elearning_universidad.grupo_administrador_universidad'):
+        if 'admin' not in self.env.user._get_roles_universidad():
             raise ValidationError("Solo un Administrador de Universidad puede programar cursos.")
-        for record in self:
-            record.write({
-                'estado_universidad': 'programado',
-                'fecha_programada_publicacion': fecha
-            })
-            # La constraint _check_requisitos_publicacion saltará aquí al guardar 'programado'
-            # Notificación de Programación
-            html_body = record._format_notification_html(
-                _("Publicación Programada"),
-                _("El curso se ha programado para publicarse el <strong>%s</strong>.") % fecha,
-                tipo='info'
-            )
-            record.message_post(body=html_body, subtype_xmlid='mail.mt_comment')
+        # Una sola escritura: la constraint _check_requisitos_publicacion valida todo el lote a la vez
+        self.write({
+            'estado_universidad': 'programado',
+            'fecha_programada_publicacion': fecha
+        })
+        # Notificación de Programación
+        self._publicar_notificacion(
+            _("Publicación Programada"),
+            Markup(_("El curso se ha programado para publicarse el <strong>%s</strong>.")) % fecha,
+            tipo='info'
+        )
 
     def action_publicar(self):
+        roles = self.env.user._get_roles_universidad()
+        es_admin = 'admin' in roles
+        es_director = 'director' in roles
         for record in self:
-            es_admin = self.env.user.has_group('elearning_universidad.grupo_administrador_universidad')
-            es_director = self.env.user.has_group('elearning_universidad.grupo_director_academico')
-            
             if record.tipo_curso in ['master', 'microcredencial'] and not es_admin:
                 raise ValidationError("Solo un Administrador de Universidad puede publicar Masters o Microcredenciales.")
             
             if record.tipo_curso == 'asignatura' and not es_director and not es_admin:
                 raise ValidationError("Solo un Director Académico o Administrador puede publicar Asignaturas.")
-            
-            # SUDO para evitar errores de permisos/recursión al renderizar correos automáticos
-            # (El sistema envía emails al notificar publicación, lo que puede chocar con las reglas de privacidad)
-            record.sudo().write({
-                'estado_universidad': 'publicado',
-                'is_published': True
-            })
-            # La constraint saltará aquí si falla algo
-            # Notificación de Publicación
-            html_body = record._format_notification_html(
-                _("Curso Publicado"),
-                _("El curso ha sido publicado y ya es visible para los usuarios."),
-                tipo='success'
-            )
-            record.message_post(body=html_body, subtype_xmlid='mail.mt_comment')
+
+        # SUDO para evitar errores de permisos/recursión al renderizar correos automáticos
+        # (El sistema envía emails al notificar publicación, lo que puede chocar con las reglas de privacidad)
+        # Una sola escritura para todo el lote; la constraint valida el lote completo de una vez
+        self.sudo().write({
+            'estado_universidad': 'publicado',
+            'is_published': True
+        })
+        # Notificación de Publicación
+        self._publicar_notificacion(
+            _("Curso Publicado"),
+            _("El curso ha sido publicado y ya es visible para los usuarios."),
+            tipo='success'
+        )
 
     def action_finalizar(self):
-        if not self.env.user.has_group('elearning_universidad.grupo_administrador_universidad'):
+        if 'admin' not in self.env.user._get_roles_universidad():
             raise ValidationError("Solo un Administrador de Universidad puede finalizar cursos.")
-        for record in self:
-            if record.estado_universidad != 'publicado':
-                raise ValidationError("Solo se pueden finalizar cursos publicados.")
-            
-            # 1. Finalizar el curso principal
-            record.write({
-                'estado_universidad': 'finalizado',
-                'active': False,
-                'is_published': False
-            })
+        if self.filtered(lambda r: r.estado_universidad != 'publicado'):
+            raise ValidationError("Solo se pueden finalizar cursos publicados.")
 
-            # 2. CASCADA: Si es Master, finalizar sus asignaturas
-            if record.tipo_curso == 'master' and record.asignatura_ids:
-                record.asignatura_ids.sudo().write({
-                    'estado_universidad': 'finalizado',
-                    'active': False,
-                    'is_published': False
-                })
+        vals_finalizado = {
+            'estado_universidad': 'finalizado',
+            'active': False,
+            'is_published': False
+        }
+        # Asignaturas de los Masters del lote (las capturamos antes de archivarlos)
+        asignaturas = self.filtered(lambda r: r.tipo_curso == 'master').asignatura_ids - self
 
-            # Notificación de Finalización
-            html_body = record._format_notification_html(
-                _("Curso Finalizado"),
-                _("El curso ha sido finalizado y archivado."),
-                tipo='secondary'
-            )
-            record.message_post(body=html_body, subtype_xmlid='mail.mt_comment')
+        # 1. Finalizar los cursos del lote en una sola escritura
+        self.write(vals_finalizado)
+
+        # 2. CASCADA: todas las asignaturas de esos Masters, también en una sola escritura
+        if asignaturas:
+            asignaturas.sudo().write(vals_finalizado)
+
+        # Notificación de Finalización
+        self._publicar_notificacion(
+            _("Curso Finalizado"),
+            _("El curso ha sido finalizado y archivado."),
+            tipo='secondary'
+        )
 
     # --- Restricciones de Creación y Edición ---
     @api.model_create_multi
     def create(self, vals_list):
+        roles = self.env.user._get_roles_universidad()
+        es_admin = 'admin' in roles
+        es_director = 'director' in roles
         for vals in vals_list:
             # Determinamos tipo: viene en vals o en context
             tipo = vals.get('tipo_curso') or self.env.context.get('default_tipo_curso') or 'microcredencial'
             
-            es_admin = self.env.user.has_group('elearning_universidad.grupo_administrador_universidad')
-            es_director = self.env.user.has_group('elearning_universidad.grupo_director_academico')
-            
             # Regla 1: Master y Micro SOLO Admin
             if tipo in ['master', 'microcredencial'] and not es_admin:
                 raise AccessError(_("Solo un Administrador de Universidad puede crear Masters o Microcredenciales."))
@@ -663,12 +992,7 @@ class CanalSlide(models.Model):
                     'precio_curso': 0.0,
                     'tiene_titulo': False
                 })
-                
-                # HERENCIA SERVER-SIDE DE DIRECTORES (Blindaje extra si el campo es invisible)
-                if 'director_academico_ids' not in vals and vals.get('master_id'):
-                    master = self.env['slide.channel'].browse(vals['master_id'])
-                    if master.director_academico_ids:
-                        vals['director_academico_ids'] = [(6, 0, master.director_academico_ids.ids)]
+
 
             # FIX: Pre-creación de Producto para Cursos de Pago
             # Odoo exige 'product_id' si enroll='payment' al crear el registro.
@@ -690,6 +1014,12 @@ class CanalSlide(models.Model):
                 vals['product_id'] = product.id
 
         cursos = super().create(vals_list)
+        # HERENCIA SERVER-SIDE DE DIRECTORES (Blindaje extra si el campo es invisible): una escritura por Master
+        cursos.sudo()._heredar_directores_master()
+        if cursos.filtered('is_published'):
+            self._invalidar_cache_catalogo()
+        cursos._sincronizar_all_personal_docente()
+        cursos._sincronizar_acceso_usuarios()
         # Sincronización producto y SLIDES DE MASTER
         for curso in cursos:
             curso._sincronizar_producto_universidad()
@@ -732,7 +1062,8 @@ class CanalSlide(models.Model):
 
     def write(self, vals):
         user = self.env.user
-        is_admin = user.has_group('elearning_universidad.grupo_administrador_universidad')
+        roles = user._get_roles_universidad()
+        is_admin = 'admin' in roles
 
         # Capturamos el estado previo de los staff para comparar (Logic for Unsubscribe)
         if 'director_academico_ids' in vals or 'personal_docente_ids' in vals:
@@ -762,7 +1093,7 @@ class CanalSlide(models.Model):
         if ('is_published' in vals or 'website_published' in vals):
              # Lógica condicional: Admin siempre, Director solo en Asignatura ASIGNADA
              if not is_admin:
-                 is_director = user.has_group('elearning_universidad.grupo_director_academico')
+                 is_director = 'director' in roles
                  if is_director:
                      # Verificamos cada registro:
                      for r in self:
@@ -778,7 +1109,7 @@ class CanalSlide(models.Model):
         campos_estructurales = ['name', 'tipo_curso', 'precio_curso', 'promoted_tag_ids']
         if any(campo in vals for campo in campos_estructurales):
              if not is_admin:
-                 is_director = user.has_group('elearning_universidad.grupo_director_academico')
+                 is_director = 'director' in roles
                  if is_director:
                       for r in self:
                            if r.tipo_curso != 'asignatura':
@@ -792,11 +1123,35 @@ class CanalSlide(models.Model):
                      raise AccessError(_("No tiene permiso para modificar estas propiedades."))
 
         res = super().write(vals)
+
+        # 4. Herencia de directores al programar/publicar o al cambiar de Master (ya con el Master nuevo).
+        # La constraint de publicación admite la asignatura sin directores si su Master los tiene.
+        if vals.get('estado_universidad') in ['programado', 'publicado'] or 'master_id' in vals:
+            self.filtered(lambda r: r.estado_universidad in ['programado', 'publicado']).sudo()._heredar_directores_master()
+
+        # Publicación programada: armamos el CRON para la hora exacta
+        if vals.get('fecha_programada_publicacion') and self.filtered(lambda c: c.estado_universidad == 'programado'):
+            self._programar_siguiente_publicacion(fechas=[fields.Datetime.to_datetime(vals['fecha_programada_publicacion'])])
+
+        # Caché del catálogo web (publicación, finalización, CRON de programación, nombre, imagen, precio...)
+        if any(campo in vals for campo in self.CAMPOS_CATALOGO):
+            self._invalidar_cache_catalogo()
+
+        # Docentes heredados (reglas de seguridad): incluye el Master anterior si la asignatura cambia de Master
+        if any(campo in vals for campo in self.CAMPOS_ALL_PERSONAL_DOCENTE):
+            afectados = self.concat(*old_masters.values()) if old_masters else self.browse()
+            (self | afectados)._sincronizar_all_personal_docente()
+        if 'director_academico_ids' in vals:
+            self._sincronizar_acceso_usuarios()
         
         # Sincronización de producto si cambian datos clave
         if any(campo in vals for campo in ['name', 'precio_curso', 'enroll', 'tipo_curso']):
             self.filtered(lambda c: c.tipo_curso in ['master', 'microcredencial'])._sincronizar_producto_universidad()
         
+        # Sincronización del survey del título
+        if any(campo in vals for campo in ['name', 'plantilla_titulo', 'survey_titulo_id', 'pregunta_titulo_id']):
+            self._sincronizar_survey_titulo()
+
         # Sincronización de SLIDE EN MASTER (Nombre, Publicación, etc)
         if any(campo in vals for campo in ['name', 'master_id', 'is_published']):
              if not self.env.context.get('avoid_slide_sync'):
@@ -816,12 +1171,12 @@ class CanalSlide(models.Model):
                 # 1. Nuevas Asignaturas -> Matricular
                 new_asignaturas = current_asignaturas - previous_asignaturas
                 if new_asignaturas:
-                    new_asignaturas.sudo()._action_add_members(socios)
+                    master._propagar_membresia(new_asignaturas, socios, 'alta', master)
                 
                 # 2. Asignaturas Eliminadas -> Desmatricular
                 removed_asignaturas = previous_asignaturas - current_asignaturas
                 if removed_asignaturas:
-                    removed_asignaturas.sudo()._remove_membership(socios.ids)
+                    master._propagar_membresia(removed_asignaturas, socios, 'baja', master)
                     
         # Propagación Inversa: Si una Asignatura cambia de Master (se agrega/quita vía master_id)
         if 'master_id' in vals:
@@ -833,13 +1188,13 @@ class CanalSlide(models.Model):
                 if current_master and current_master != previous_master:
                     socios_master = current_master.channel_partner_ids.mapped('partner_id')
                     if socios_master:
-                        asignatura.sudo()._action_add_members(socios_master)
+                        asignatura._propagar_membresia(asignatura, socios_master, 'alta', current_master)
                 
                 # B. Salida de Master (Remove/Switch) -> Eliminar alumnos del Viejo Master
                 if previous_master and previous_master != current_master:
                     socios_old = previous_master.channel_partner_ids.mapped('partner_id')
                     if socios_old:
-                        asignatura.sudo()._remove_membership(socios_old.ids)
+                        asignatura._propagar_membresia(asignatura, socios_old, 'baja', previous_master)
 
         # Sincronización de SEGUIDORES (Nativo Odoo)
         if old_staff:
@@ -865,7 +1220,7 @@ class CanalSlide(models.Model):
     def unlink(self):
         # PROTECCIÓN DE BORRADO: Solo Administradores
         user = self.env.user
-        if not user.has_group('elearning_universidad.grupo_administrador_universidad'):
+        if 'admin' not in user._get_roles_universidad():
             raise AccessError(_("Solo los Administradores de Universidad pueden eliminar cursos."))
 
         # Limpieza de slides representativos en Masters antes de borrar el curso
@@ -878,37 +1233,186 @@ class CanalSlide(models.Model):
                 ])
                 if slides_vinculados:
                     slides_vinculados.unlink()
-        
-        return super().unlink()
+
+        # Los Masters de las asignaturas borradas pierden sus docentes heredados
+        masters = self.master_id - self
+        if self.filtered('is_published'):
+            self._invalidar_cache_catalogo()
+        res = super().unlink()
+        masters._sincronizar_all_personal_docente()
+        return res
 
     @api.model
     def _cron_publicar_cursos_programados(self):
-        """ CRON para publicar cursos cuya fecha programada haya llegado """
+        """ CRON para publicar cursos cuya fecha programada haya llegado.
+
+        Publica todos los cursos vencidos en un lote y se re-programa para la siguiente
+        fecha exacta (ir.cron._trigger), sin necesidad de sondear cada pocos minutos.
+        """
         cursos = self.search([
             ('estado_universidad', '=', 'programado'),
             ('fecha_programada_publicacion', '<=', fields.Datetime.now())
         ])
-        for curso in cursos:
+        # Descartamos (y dejamos en el log) los cursos que no cumplen los requisitos
+        infracciones = cursos.sudo()._get_infracciones_publicacion()
+        for curso_id, mensajes in infracciones.items():
+            _logger.error(f"No se pudo publicar el curso programado {curso_id}: {' '.join(mensajes)}")
+        cursos = cursos.filtered(lambda c: c.id not in infracciones)
+        if cursos:
             # Llamamos a action_publicar con sudo para bypass de permisos en CRON
-            curso.sudo().action_publicar()
+            try:
+                with self.env.cr.savepoint():
+                    cursos.sudo().action_publicar()
+            except ValidationError:
+                # Fallo inesperado en el lote: publicamos uno a uno para aislar al culpable
+                for curso in cursos:
+                    try:
+                        with self.env.cr.savepoint():
+                            curso.sudo().action_publicar()
+                    except ValidationError as e:
+                        _logger.error(f"No se pudo publicar el curso programado {curso.id}: {str(e)}")
+        self._programar_siguiente_publicacion()
+
+    @api.model
+    def _programar_siguiente_publicacion(self, fechas=None):
+        """ Dispara el CRON de publicación en la fecha programada más próxima (o en las fechas dadas) """
+        if fechas is None:
+            siguiente = self.sudo().search([
+                ('estado_universidad', '=', 'programado'),
+                ('fecha_programada_publicacion', '>', fields.Datetime.now())
+            ], order='fecha_programada_publicacion', limit=1)
+            fechas = siguiente.mapped('fecha_programada_publicacion')
+        if fechas:
+            self.env.ref('elearning_universidad.ir_cron_publicar_cursos_programados').sudo()._trigger(at=fechas)
+
+
+    # --- Títulos: survey "wrapper" del curso ---
+    def _get_survey_titulo(self):
+        """ Survey del título y su pregunta puntuable. Se crean la primera vez que se emite un título. """
+        self.ensure_one()
+        channel = self.sudo()
+        survey, question = channel.survey_titulo_id, channel.pregunta_titulo_id
+        if not survey.exists() or not question.exists():
+            survey, question = self._crear_survey_titulo()
+        return survey, question
+
+    def _crear_survey_titulo(self):
+        """ Crea (o completa) el survey "wrapper" del título y lo registra en el curso """
+        self.ensure_one()
+        channel = self.sudo()
+        survey = channel.survey_titulo_id
+        if not survey.exists():
+            # Usamos el nombre exacto del curso para que en el certificado salga bien (ej. "Master en Data Science")
+            survey = self.env['survey.survey'].sudo().create({
+                'title': channel.name,
+                'certification': True,
+                'scoring_type': 'scoring_without_answers', # Odoo a veces re-computa
+                'certification_report_layout': channel.plantilla_titulo or 'modern_gold',
+                'scoring_success_min': 0.0,
+            })
+
+        # HACK: Asegurar que el survey tenga AL MENOS una pregunta puntuable,
+        # de lo contrario scoring_percentage siempre será 0 (Odoo lo calcula sobre el total de puntos posibles)
+        question = survey.question_ids[:1]
+        if not question:
+            question = self.env['survey.question'].sudo().create({
+                'survey_id': survey.id,
+                'title': 'Nota de Expediente',
+                'question_type': 'numerical_box',
+                'answer_score': 10.0, # Max score 10
+                'is_scored_question': True,
+                'sequence': 0,
+            })
 
+        channel.write({'survey_titulo_id': survey.id, 'pregunta_titulo_id': question.id})
+        return survey, question
+
+    def _sincronizar_survey_titulo(self):
+        """ Mantiene título y layout del survey "wrapper" alineados con el curso """
+        for channel in self.sudo().filtered('survey_titulo_id'):
+            layout = channel.plantilla_titulo or 'modern_gold'
+            vals = {}
+            if channel.survey_titulo_id.title != channel.name:
+                vals['title'] = channel.name
+            if channel.survey_titulo_id.certification_report_layout != layout:
+                vals['certification_report_layout'] = layout
+            if vals:
+                channel.survey_titulo_id.write(vals)
 
     # --- Propagación de Matrículas (Altas y Bajas) ---
     def _action_add_members(self, target_partners, **kwargs):
-        """ Al unirse a un Master, crea registros de seguimiento para contenidos evaluables """
+        """ Al unirse a un Master, se matricula también en sus asignaturas y se crean
+        los registros de seguimiento de los contenidos evaluables.
+
+        El cierre Master + Asignaturas se calcula de antemano: las inscripciones de las
+        asignaturas se crean en una sola llamada y los registros de seguimiento en un solo lote.
+        """
         res = super()._action_add_members(target_partners, **kwargs)
-        for curso in self:
-            # 1. Proactividad: Asegurar registros de seguimiento para contenidos evaluables
-            evaluable_slides = curso.slide_ids.filtered(lambda s: s.es_evaluable)
-            if evaluable_slides:
-                evaluable_slides.sudo()._asegurar_registros_seguimiento()
-            
-            # 2. Propagación recursiva para Masters
-            if curso.tipo_curso == 'master' and curso.asignatura_ids:
-                # Matriculamos recursivamente en las asignaturas usando sudo
-                curso.asignatura_ids.sudo()._action_add_members(target_partners, **kwargs)
+        # Las asignaturas matriculadas desde _propagar_matricula no propagan a su vez
+        if not self.env.context.get('universidad_sin_propagacion'):
+            self._propagar_matricula(target_partners, **kwargs)
         return res
 
+    def _propagar_matricula(self, target_partners, **kwargs):
+        """ Matricula en las asignaturas de los Masters de self y asegura los registros de seguimiento.
+        Devuelve (inscripciones nuevas en asignaturas, registros de seguimiento creados).
+        """
+        # 1. Cierre de la matrícula: asignaturas de los Masters (la jerarquía solo tiene un nivel)
+        asignaturas = (self.filtered(lambda c: c.tipo_curso == 'master').asignatura_ids - self).sudo()
+        nuevas = self.env['slide.channel.partner']
+        if asignaturas and target_partners:
+            # Pasamos por toda la cadena de _action_add_members (otros módulos incluidos); el flag evita
+            # que las asignaturas repitan la propagación (sus registros de seguimiento se crean abajo)
+            nuevas = asignaturas.with_context(universidad_sin_propagacion=True)._action_add_members(target_partners, **kwargs)
+
+        # 2. Registros de seguimiento de todos los cursos del cierre, en un único lote
+        registros = 0
+        evaluable_slides = (self | asignaturas).slide_ids.filtered(lambda s: s.es_evaluable)
+        if evaluable_slides and target_partners:
+            registros = evaluable_slides.sudo()._asegurar_registros_seguimiento(partner_ids=target_partners.ids)
+        return nuevas, registros
+
+    def _propagar_membresia(self, asignaturas, socios, operacion, master):
+        """ Alta/baja de los alumnos de un Master en sus asignaturas.
+
+        Por encima de UMBRAL_PROPAGACION_SINCRONA alumnos se encola para el CRON,
+        de modo que el guardado del formulario no espera a la propagación.
+        """
+        if len(socios) > self.UMBRAL_PROPAGACION_SINCRONA and not self.env.context.get('propagacion_sincrona'):
+            return self.env['slide.channel.propagacion']._encolar(asignaturas, socios, operacion, master=master)
+        if operacion == 'alta':
+            asignaturas.sudo()._action_add_members(socios)
+        else:
+            asignaturas.sudo()._remove_membership(socios.ids)
+
+    def matricular_cohorte(self, partners):
+        """ Matrícula masiva de una cohorte en los cursos (y en las asignaturas de los Masters).
+        Devuelve un resumen con las inscripciones creadas por curso y los registros de seguimiento creados.
+        """
+        self.check_access('write')
+        if not isinstance(partners, models.BaseModel):
+            partners = self.env['res.partner'].browse(partners)
+        inicio = time.monotonic()
+        # Misma cadena que _action_add_members, pero con la propagación explícita para recoger su resultado
+        nuevas = self.with_context(universidad_sin_propagacion=True)._action_add_members(partners)
+        nuevas_asignaturas, registros = self._propagar_matricula(partners)
+        inscripciones = (nuevas or self.env['slide.channel.partner']) | nuevas_asignaturas
+        resumen = {
+            'alumnos': len(partners),
+            'inscripciones': len(inscripciones),
+            'inscripciones_por_curso': {
+                channel.id: len(lineas) for channel, lineas in inscripciones.grouped('channel_id').items()
+            },
+            'registros_seguimiento': registros,
+            'segundos': round(time.monotonic() - inicio, 2),
+        }
+        _logger.info(
+            "Matrícula de cohorte: %(alumnos)s alumnos, %(inscripciones)s inscripciones, "
+            "%(registros_seguimiento)s registros de seguimiento (%(segundos)ss)",
+            resumen
+        )
+        return resumen
+
     def _remove_membership(self, partner_ids):
         """ Al desmatricular de un Master, se desmatricula automáticamente de sus asignaturas """
         res = super()._remove_membership(partner_ids)
@@ -0,0 +1,28 @@
+from odoo import models, fields, api
+from datetime import timedelta
+
+
+class EmisionTitulos(models.Model):
+    """ Registro de cada ejecución del CRON de emisión de títulos (rendimiento para administración) """
+    _name = 'slide.channel.emision'
+    _description = 'Ejecución de Emisión de Títulos'
+    _order = 'fecha_inicio desc, id desc'
+
+    # Días que se conservan las ejecuciones
+    DIAS_CONSERVACION = 30
+
+    fecha_inicio = fields.Datetime(string='Inicio', required=True, readonly=True, index=True)
+    duracion = fields.Float(string='Duración (s)', readonly=True)
+    worker = fields.Selection([
+        ('principal', 'Principal'),
+        ('adicional', 'Adicional')
+    ], string='Worker', readonly=True)
+    emitidos = fields.Integer(string='Emitidos', readonly=True)
+    fallidos = fields.Integer(string='Fallidos', readonly=True)
+    titulos_minuto = fields.Float(string='Títulos/minuto', readonly=True, digits=(16, 2))
+
+    @api.autovacuum
+    def _gc_ejecuciones_antiguas(self):
+        """ Elimina las ejecuciones de más de DIAS_CONSERVACION días """
+        limite = fields.Datetime.now() - timedelta(days=self.DIAS_CONSERVACION)
+        self.search([('fecha_inicio', '<', limite)]).unlink()
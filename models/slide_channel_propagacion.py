@@ -0,0 +1,103 @@
+from odoo import models, fields, api, Command
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+class PropagacionMatricula(models.Model):
+    """ Cola de propagación de matrículas Master -> Asignatura.
+
+    Cuando una asignatura entra o sale de un Master con muchos alumnos, la alta/baja
+    de cada alumno se encola aquí y la procesa un CRON por lotes. Cada lote quita a sus
+    alumnos de la lista pendiente en la misma transacción, por lo que una ejecución
+    interrumpida se reanuda donde se quedó (altas y bajas son idempotentes).
+    """
+    _name = 'slide.channel.propagacion'
+    _description = 'Propagación de Matrícula'
+    _order = 'id'
+
+    channel_id = fields.Many2one('slide.channel', string='Asignatura', required=True, ondelete='cascade', index=True)
+    master_id = fields.Many2one('slide.channel', string='Master', ondelete='cascade', index=True)
+    operacion = fields.Selection([
+        ('alta', 'Matricular'),
+        ('baja', 'Desmatricular')
+    ], string='Operación', required=True)
+    partner_ids = fields.Many2many(
+        'res.partner',
+        'slide_channel_propagacion_partner_rel',
+        'propagacion_id', 'partner_id',
+        string='Alumnos Pendientes'
+    )
+    total = fields.Integer(string='Total', readonly=True)
+    procesados = fields.Integer(string='Procesados', readonly=True)
+    estado = fields.Selection([
+        ('pendiente', 'Pendiente'),
+        ('en_curso', 'En Curso'),
+        ('hecho', 'Hecho'),
+        ('error', 'Error')
+    ], string='Estado', default='pendiente', required=True, index=True)
+    mensaje_error = fields.Text(string='Error', readonly=True)
+
+    @api.model
+    def _encolar(self, asignaturas, partners, operacion, master=None):
+        """ Encola la alta/baja de partners en las asignaturas y dispara el CRON """
+        if not asignaturas or not partners:
+            return self
+        trabajos = self.sudo().create([{
+            'channel_id': asignatura.id,
+            'master_id': master.id if master else False,
+            'operacion': operacion,
+            'partner_ids': [Command.set(partners.ids)],
+            'total': len(partners),
+        } for asignatura in asignaturas])
+        self.env.ref('elearning_universidad.ir_cron_propagar_matriculas')._trigger()
+        return trabajos
+
+    @api.model
+    def _cron_propagar_matriculas(self, chunk_size=200, tiempo_max=240):
+        """ CRON que procesa la cola de propagación por lotes, en orden de llegada """
+        inicio = time.monotonic()
+        testing = getattr(threading.current_thread(), 'testing', False)
+        trabajos = self.search([('estado', 'in', ['pendiente', 'en_curso'])])
+        for trabajo in trabajos:
+            while trabajo.partner_ids:
+                if time.monotonic() - inicio >= tiempo_max:
+                    # Presupuesto agotado: re-disparamos el CRON para continuar
+                    self.env.ref('elearning_universidad.ir_cron_propagar_matriculas')._trigger()
+                    return
+                lote = trabajo.partner_ids[:chunk_size]
+                try:
+                    with self.env.cr.savepoint():
+                        trabajo._procesar_lote(lote)
+                except Exception as e:
+                    _logger.error(f"Error propagando matrícula {trabajo.id}: {str(e)}")
+                    trabajo.write({'estado': 'error', 'mensaje_error': str(e)})
+                    break
+                finally:
+                    # Confirmamos el lote: si el proceso muere, se reanuda desde aquí
+                    if not testing:
+                        self.env.cr.commit()
+            if trabajo.estado != 'error':
+                trabajo.estado = 'hecho'
+                if not testing:
+                    self.env.cr.commit()
+
+    def _procesar_lote(self, partners):
+        """ Aplica la operación a un lote de alumnos y lo descuenta de la lista pendiente """
+        self.ensure_one()
+        asignatura = self.channel_id.sudo()
+        if self.operacion == 'alta':
+            asignatura._action_add_members(partners)
+        else:
+            asignatura._remove_membership(partners.ids)
+        self.write({
+            'partner_ids': [Command.unlink(partner_id) for partner_id in partners.ids],
+            'procesados': self.procesados + len(partners),
+            'estado': 'en_curso',
+        })
+
+    def action_reintentar(self):
+        """ Vuelve a poner en cola los trabajos con error """
+        self.filtered(lambda t: t.estado == 'error').write({'estado': 'pendiente', 'mensaje_error': False})
+        self.env.ref('elearning_universidad.ir_cron_propagar_matriculas')._trigger()
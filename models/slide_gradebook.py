@@ -1,10 +1,23 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.osv import expression
+from odoo.tools import SQL
+from odoo.tools.mimetypes import guess_mimetype
+from odoo.tools.sql import create_index, drop_index
 import base64
+import hashlib
 import logging
+import mimetypes
+import os
+import tempfile
+import threading
+import time
 
 _logger = logging.getLogger(__name__)
 
+# Permisos de los archivos de entrega en el filestore (los de ir.attachment._file_write con la umask habitual 022)
+MODO_ARCHIVO_FILESTORE = 0o644
+
 class SlideSlidePartner(models.Model):
     _inherit = 'slide.slide.partner'
 
@@ -13,6 +26,7 @@ class SlideSlidePartner(models.Model):
         string='Inscripción en Curso',
         compute='_compute_channel_partner_id',
         store=True,
+        index=True, # Usado por evaluaciones_ids, las medias SQL y la reparación de registros
         ondelete='set null'# Evitamos que el alumno pierda su historial en caso de que se borre el curso o se desmatricule.
     )
 
@@ -27,6 +41,11 @@ class SlideSlidePartner(models.Model):
     # --- Gestión de Entregas (Archivos) ---
     archivo_entrega = fields.Binary("Archivo Entregado")
     nombre_archivo = fields.Char("Nombre del Archivo")
+    # Metadatos de la entrega: las vistas leen solo esto, nunca el contenido binario
+    attachment_entrega_id = fields.Many2one('ir.attachment', string='Adjunto de la Entrega', readonly=True, copy=False, index='btree_not_null', ondelete='set null')
+    tamano_entrega = fields.Integer(related='attachment_entrega_id.file_size', string='Tamaño (bytes)', store=True)
+    checksum_entrega = fields.Char(related='attachment_entrega_id.checksum', string='Checksum', store=True)
+    mimetype_entrega = fields.Char(related='attachment_entrega_id.mimetype', string='Tipo de Archivo', store=True)
     fecha_entrega = fields.Datetime("Fecha de Presentación")
 
     # --- Campos Relacionados (UI Helpers) ---
@@ -39,6 +58,163 @@ class SlideSlidePartner(models.Model):
             if record.nota_evaluacion < 0 or record.nota_evaluacion > 10:
                 raise ValidationError("La nota debe estar entre 0 y 10")
 
+    # Tamaño de bloque para la copia de las entregas al filestore
+    TAMANO_BLOQUE_ENTREGA = 1024 * 1024
+
+    def _guardar_entrega(self, stream, filename, limite_bytes):
+        """ Guarda la entrega copiando por bloques el archivo ya recibido (werkzeug lo vuelca a disco).
+
+        Con el almacenamiento en filestore, el archivo se escribe directamente en su ruta final
+        sin cargarlo entero en memoria ni pasar por base64. Lanza ValidationError si se supera el límite.
+        """
+        self.ensure_one()
+        # El archivo ya está completo: su tamaño se comprueba antes de copiar nada
+        stream.seek(0, os.SEEK_END)
+        if limite_bytes and stream.tell() > limite_bytes:
+            raise ValidationError(_("El archivo supera el tamaño máximo permitido para este curso."))
+        stream.seek(0)
+
+        Attachment = self.env['ir.attachment'].sudo()
+        en_filestore = Attachment._storage() != 'db'
+        directorio = Attachment._filestore() if en_filestore else None
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        # 1. Copia por bloques a un temporal (en el propio filestore: el rename final es atómico)
+        sha = hashlib.sha1()
+        tamano = 0
+        cabecera = b''
+        tmp = tempfile.NamedTemporaryFile(dir=directorio, prefix='entrega-', delete=False)
+        try:
+            with tmp:
+                while True:
+                    bloque = stream.read(self.TAMANO_BLOQUE_ENTREGA)
+                    if not bloque:
+                        break
+                    tamano += len(bloque)
+                    if not cabecera:
+                        cabecera = bloque[:1024]
+                    sha.update(bloque)
+                    tmp.write(bloque)
+
+            checksum = sha.hexdigest()
+            vals = None if not tamano else {
+                'name': 'archivo_entrega',
+                'type': 'binary',
+                'res_model': self._name,
+                'res_field': 'archivo_entrega',
+                'res_id': self.id,
+                'mimetype': self._get_mimetype_entrega(cabecera, filename),
+            }
+            if not tamano:
+                # Archivo vacío: se vacía el campo (como el antiguo archivo_entrega=False)
+                os.unlink(tmp.name)
+            elif en_filestore:
+                # 2. Misma ruta que ir.attachment._file_write: <sha[:2]>/<sha> (deduplicado)
+                store_fname = f'{checksum[:2]}/{checksum}'
+                ruta = Attachment._full_path(store_fname)
+                if os.path.exists(ruta):
+                    os.unlink(tmp.name)
+                else:
+                    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                    # NamedTemporaryFile crea el archivo con 0600: igualamos los permisos del filestore
+                    os.chmod(tmp.name, MODO_ARCHIVO_FILESTORE)
+                    os.replace(tmp.name, ruta)
+                # Si la transacción falla, el GC del filestore eliminará el archivo huérfano
+                Attachment._mark_for_gc(store_fname)
+                vals.update({'store_fname': store_fname, 'checksum': checksum, 'file_size': tamano})
+            else:
+                # Almacenamiento en base de datos: no hay filestore al que escribir directamente
+                with open(tmp.name, 'rb') as f:
+                    vals['raw'] = f.read()
+                os.unlink(tmp.name)
+        except Exception:
+            if os.path.exists(tmp.name):
+                os.unlink(tmp.name)
+            raise
+
+        # 3. Sustituimos el adjunto del campo binario (attachment=True)
+        Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'archivo_entrega'),
+            ('res_id', '=', self.id),
+        ]).unlink()
+        attachment = Attachment.create(vals) if vals else Attachment
+        self.invalidate_recordset(['archivo_entrega'])
+
+        self.write({
+            'attachment_entrega_id': attachment.id,
+            'nombre_archivo': filename,
+            'estado_evaluacion': 'pendiente_revision',
+            'fecha_entrega': fields.Datetime.now()
+        })
+        return tamano
+
+    @api.model
+    def _get_mimetype_entrega(self, cabecera, filename):
+        """ Mimetype de la entrega a partir de su cabecera y, si no es concluyente, de su nombre.
+
+        Los formatos basados en zip (docx, xlsx, odt...) solo se reconocen leyendo el archivo
+        completo: con la cabecera salen como zip u octet-stream, así que manda la extensión.
+        """
+        mimetype = guess_mimetype(cabecera)
+        if mimetype in ('application/octet-stream', 'application/zip', 'text/plain'):
+            mimetype = mimetypes.guess_type(filename or '')[0] or mimetype
+        return mimetype
+
+    def init(self):
+        super().init()
+        # Relleno de metadatos de entregas existentes (idempotente)
+        self.env.cr.execute("""
+            UPDATE slide_slide_partner ssp
+               SET attachment_entrega_id = a.id,
+                   tamano_entrega = a.file_size,
+                   checksum_entrega = a.checksum,
+                   mimetype_entrega = a.mimetype
+              FROM ir_attachment a
+             WHERE a.res_model = 'slide.slide.partner'
+               AND a.res_field = 'archivo_entrega'
+               AND a.res_id = ssp.id
+               AND ssp.attachment_entrega_id IS NULL
+        """)
+
+    def _sincronizar_attachment_entrega(self):
+        """ Enlaza attachment_entrega_id con el adjunto del campo archivo_entrega (una búsqueda para todo self) """
+        adjuntos = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'archivo_entrega'),
+            ('res_id', 'in', self.ids),
+        ])
+        adjunto_por_registro = {adjunto.res_id: adjunto.id for adjunto in adjuntos}
+        for record in self:
+            adjunto_id = adjunto_por_registro.get(record.id, False)
+            if record.attachment_entrega_id.id != adjunto_id:
+                record.attachment_entrega_id = adjunto_id
+
+    def action_descargar_entrega(self):
+        """ Descarga la entrega en streaming desde el filestore (sin pasar por base64) """
+        self.ensure_one()
+        if not self.attachment_entrega_id:
+            raise ValidationError(_("Este registro no tiene ninguna entrega."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{self._name}/{self.id}/archivo_entrega?download=true',
+            'target': 'self',
+        }
+
+    def action_descargar_entregas_zip(self):
+        """ Descarga en un ZIP (streaming) las entregas seleccionadas de un mismo entregable """
+        entregas = self.filtered('attachment_entrega_id')
+        if not entregas:
+            raise ValidationError(_("Ninguno de los registros seleccionados tiene entrega."))
+        if len(entregas.slide_id) > 1 or entregas.slide_id.slide_category != 'delivery':
+            raise ValidationError(_("Seleccione entregas de un único entregable."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f"/universidad/entregas/{entregas.slide_id.id}/zip?ids={','.join(map(str, entregas.ids))}",
+            'target': 'self',
+        }
+
     def accion_confirmar_nota(self):
         """ El profesor confirma que la nota del contenido es definitiva """
         for record in self:
@@ -47,15 +223,20 @@ class SlideSlidePartner(models.Model):
 
     @api.depends('channel_id', 'partner_id')
     def _compute_channel_partner_id(self):
+        # Resolución en lote: UNA búsqueda para todos los pares (curso, alumno) del recálculo
+        con_datos = self.filtered(lambda r: r.channel_id and r.partner_id)
+        inscripciones = self.env['slide.channel.partner'].search([
+            ('channel_id', 'in', con_datos.channel_id.ids),
+            ('partner_id', 'in', con_datos.partner_id.ids)
+        ], order='id') if con_datos else self.env['slide.channel.partner']
+
+        # Mapeo en memoria: (channel_id, partner_id) -> inscripción (la primera, como el antiguo limit=1)
+        inscripcion_map = {}
+        for inscripcion in inscripciones:
+            inscripcion_map.setdefault((inscripcion.channel_id.id, inscripcion.partner_id.id), inscripcion)
+
         for record in self:
-            if record.channel_id and record.partner_id:
-                # Buscamos la inscripción que coincida con el curso y el alumno
-                record.channel_partner_id = self.env['slide.channel.partner'].search([
-                    ('channel_id', '=', record.channel_id.id),
-                    ('partner_id', '=', record.partner_id.id)
-                ], limit=1)
-            else:
-                record.channel_partner_id = False
+            record.channel_partner_id = inscripcion_map.get((record.channel_id.id, record.partner_id.id), False)
 
     def write(self, vals):
         # Bloqueo de Modificación de Notas
@@ -102,12 +283,29 @@ class SlideSlidePartner(models.Model):
             vals['estado_evaluacion'] = 'pendiente_revision'
             vals['fecha_entrega'] = fields.Datetime.now()
  
-        return super().write(vals)
+        res = super().write(vals)
+        # Subida por el ORM (backend): enlazamos el adjunto que Odoo acaba de crear
+        if 'archivo_entrega' in vals:
+            self._sincronizar_attachment_entrega()
+        return res
 
 class SlideChannelPartner(models.Model):
     _name = 'slide.channel.partner'
     _inherit = ['slide.channel.partner', 'mail.thread', 'mail.activity.mixin']
 
+    # Predicado de la cola de títulos, escrito como lo compila el ORM (titulo_emitido = False):
+    # PostgreSQL solo usa el índice parcial si la consulta implica literalmente su predicado
+    _PREDICADO_COLA_TITULOS = "estado_nota = 'pendiente_certificar' AND (titulo_emitido IS NULL OR titulo_emitido = false)"
+
+    def init(self):
+        super().init()
+        # Índice parcial de la cola de emisión de títulos (_reclamar_lote_titulos y _get_dominio_cola_titulos)
+        drop_index(self.env.cr, 'slide_channel_partner_titulo_pendiente_idx', self._table)
+        create_index(
+            self.env.cr, 'slide_channel_partner_cola_titulos_idx', self._table,
+            ['id'], where=self._PREDICADO_COLA_TITULOS
+        )
+
     @api.model_create_multi
     def create(self, vals_list):
         """ Sobrescribimos create para evitar que el responsable del curso se inscriba automáticamente como alumno """
@@ -138,18 +336,32 @@ class SlideChannelPartner(models.Model):
         
         # PROPAGACIÓN ASCENDENTE: Si cambia la nota de una asignatura, avisar al Master
         if 'nota_final' in vals:
-            for record in self:
-                if record.channel_id.tipo_curso == 'asignatura' and record.channel_id.master_id:
-                    # Buscamos la inscripción del alumno en el Master padre
-                    master_enrollment = self.search([
-                        ('channel_id', '=', record.channel_id.master_id.id),
-                        ('partner_id', '=', record.partner_id.id)
-                    ], limit=1)
-                    
-                    if master_enrollment:
-                        master_enrollment._compute_nota_academica()
+            self._propagar_nota_masters()
         return res
 
+    def _propagar_nota_masters(self):
+        """ Encola en lote el recálculo de la nota de los Masters afectados por estas inscripciones """
+        inscripciones_asig = self.filtered(
+            lambda r: r.channel_id.tipo_curso == 'asignatura' and r.channel_id.master_id
+        )
+        if not inscripciones_asig:
+            return
+
+        # 1. Pares (Master, Alumno) afectados por la escritura
+        pares = {(r.channel_id.master_id.id, r.partner_id.id) for r in inscripciones_asig}
+
+        # 2. Búsqueda ÚNICA de las inscripciones en los Masters padre
+        candidatas = self.search([
+            ('channel_id', 'in', list({master_id for master_id, dummy in pares})),
+            ('partner_id', 'in', list({partner_id for dummy, partner_id in pares}))
+        ])
+        master_enrollments = candidatas.filtered(lambda i: (i.channel_id.id, i.partner_id.id) in pares)
+
+        # 3. Marcamos para recálculo: el ORM ejecuta _compute_nota_academica UNA vez
+        # sobre todas las inscripciones pendientes al hacer flush (sin un write por registro).
+        if master_enrollments:
+            self.env.add_to_compute(self._fields['nota_final'], master_enrollments)
+
 
 
     today = fields.Date.today()
@@ -179,6 +391,8 @@ class SlideChannelPartner(models.Model):
     titulo_emitido = fields.Boolean(string="Título Generado", default=False, readonly=True)
     fecha_emision_titulo = fields.Datetime(string="Fecha de Emisión", readonly=True)
     survey_user_input_id = fields.Many2one('survey.user_input', string="Certificación Vinculada", readonly=True)
+    # Último error del CRON de emisión: la inscripción sale de la cola hasta que se reintenta
+    error_emision_titulo = fields.Text(string="Error de Emisión", readonly=True, copy=False)
 
     nota_manual = fields.Boolean(
         string='Corrección Manual', 
@@ -194,7 +408,7 @@ class SlideChannelPartner(models.Model):
     @api.depends('channel_id', 'channel_id.tipo_curso')
     def _compute_can_grade_manually(self):
         user = self.env.user
-        is_admin = user.has_group('elearning_universidad.grupo_administrador_universidad') or user.has_group('base.group_system')
+        is_admin = bool(user._get_roles_universidad() & {'admin', 'sistema'})
         
         for record in self:
             if is_admin:
@@ -241,6 +455,70 @@ class SlideChannelPartner(models.Model):
         string='Asignaturas dadas por este alumno en este Master'
     )
 
+    @api.model
+    def _get_arbol_notas_portal(self, enrollments):
+        """ Árbol de notas del portal (/my/grades) como diccionarios planos:
+        inscripciones -> asignaturas (Masters) -> contenidos evaluados.
+
+        Número constante de consultas, independiente del número de cursos y asignaturas:
+        una para las asignaturas de todos los Masters y otra para todos los contenidos evaluados.
+        Los alumnos ven siempre todo su expediente (como en asignatura_partner_ids para el propio alumno).
+        """
+        enrollments = enrollments.sudo()
+        masters = enrollments.filtered(lambda e: e.channel_id.tipo_curso == 'master')
+
+        # 1. Inscripciones en las asignaturas publicadas de todos los Masters (una consulta)
+        asignaturas = self.sudo().search([
+            ('partner_id', 'in', masters.partner_id.ids),
+            ('channel_id.master_id', 'in', masters.channel_id.ids),
+            ('channel_id.tipo_curso', '=', 'asignatura'),
+            ('channel_id.estado_universidad', '=', 'publicado')
+        ]) if masters else self.sudo()
+        asignaturas_por_master = {}
+        for asignatura in asignaturas:
+            clave = (asignatura.channel_id.master_id.id, asignatura.partner_id.id)
+            asignaturas_por_master.setdefault(clave, []).append(asignatura)
+
+        # 2. Contenidos evaluados de todas las inscripciones (una consulta, mismo dominio que evaluaciones_ids)
+        todas = enrollments | asignaturas
+        contenidos = self.env['slide.slide.partner'].sudo().search(
+            expression.AND([self._fields['evaluaciones_ids'].domain, [
+                ('channel_partner_id', 'in', todas.ids),
+                ('estado_evaluacion', '=', 'evaluado'),
+            ]])
+        ) if todas else self.env['slide.slide.partner']
+        contenidos_por_inscripcion = {}
+        for contenido in contenidos:
+            contenidos_por_inscripcion.setdefault(contenido.channel_partner_id.id, []).append({
+                'nombre': contenido.slide_id.name,
+                'categoria': contenido.slide_category,
+                'es_evaluable': contenido.es_evaluable,
+                'nota': contenido.nota_evaluacion,
+            })
+
+        tipos_curso = dict(self.env['slide.channel']._fields['tipo_curso']._description_selection(self.env))
+
+        def nodo(inscripcion):
+            return {
+                'id': inscripcion.id,
+                'nombre': inscripcion.channel_id.name,
+                'tipo_curso': inscripcion.channel_id.tipo_curso,
+                'tipo_curso_label': tipos_curso.get(inscripcion.channel_id.tipo_curso, ''),
+                'con_nota': inscripcion.estado_nota in ('evaluado', 'pendiente_certificar', 'certificado'),
+                'nota_final': inscripcion.nota_final,
+                'contenidos': contenidos_por_inscripcion.get(inscripcion.id, []),
+            }
+
+        arbol = []
+        for enrollment in enrollments:
+            datos = nodo(enrollment)
+            datos['asignaturas'] = [
+                nodo(asignatura)
+                for asignatura in asignaturas_por_master.get((enrollment.channel_id.id, enrollment.partner_id.id), [])
+            ] if datos['tipo_curso'] == 'master' else []
+            arbol.append(datos)
+        return arbol
+
     def _set_asignatura_partner_ids(self):
         """ Método inverse dummy para permitir edición en el popup One2many """
         pass
@@ -249,7 +527,7 @@ class SlideChannelPartner(models.Model):
     def _compute_asignatura_partner_ids(self):
         # Obtener el usuario actual para filtrar visibilidad
         current_user = self.env.user
-        is_admin = current_user.has_group('elearning_universidad.grupo_administrador_universidad') or current_user.has_group('base.group_system')
+        is_admin = bool(current_user._get_roles_universidad() & {'admin', 'sistema'})
 
         for record in self:
             if record.channel_id.tipo_curso == 'master':
@@ -279,6 +557,7 @@ class SlideChannelPartner(models.Model):
         'nota_manual',
         'evaluaciones_ids.nota_evaluacion', 
         'evaluaciones_ids.estado_evaluacion',
+        'evaluaciones_ids.slide_id.es_evaluable',
         'channel_id.asignatura_ids.total_time'
     )
     def _compute_nota_academica(self):
@@ -290,8 +569,14 @@ class SlideChannelPartner(models.Model):
         others_records = auto_records - masters_records # Asignatura, Microcredencial
         
         # 3. Procesamiento Estándar (Otros)
-        # Odoo prefetch maneja bien las evaluaciones_ids si iteramos
-        for record in others_records:
+        # Registros ya guardados: media agregada en SQL (una consulta para todo el lote)
+        # Registros en memoria (onchange / NewId): cálculo en Python sobre la caché del ORM
+        stored_records = others_records.filtered(lambda r: isinstance(r.id, int))
+        medias = stored_records._get_medias_evaluables_sql() if stored_records else {}
+        for record in stored_records:
+            record.nota_final = round(medias.get(record.id, 0.0), 2)
+
+        for record in others_records - stored_records:
             # FILTRO: Solo calculamos media de los contenidos marcados como 'es_evaluable'
             # Permitimos que el profesor evalúe los otros (feedback), pero no suman.
             evals = record.evaluaciones_ids.filtered(lambda x: x.slide_id.es_evaluable)
@@ -325,19 +610,27 @@ class SlideChannelPartner(models.Model):
             scores_map = {}
 
         # Pre-cálculo de datos de Masters para evitar re-sumar horas en cada alumno
+        # Consulta AGRUPADA ÚNICA de los slides tipo 'sub_course' (Asignaturas) de todos los Masters.
+        # Estos contienen la duración OFICIAL para la ponderación académica.
+        duraciones = self.env['slide.slide']._read_group(
+            [
+                ('channel_id', 'in', all_masters.ids),
+                ('slide_category', '=', 'sub_course'),
+                ('asignatura_id', '!=', False)
+            ],
+            groupby=['channel_id', 'asignatura_id'],
+            aggregates=['completion_time:sum']
+        )
+
+        # Mapa por Master: ID del Canal Asignatura -> Duración (Slide)
+        # Esto permite buscar rápido la duración de una asignatura dado su canal_id
+        duration_maps = {master.id: {} for master in all_masters}
+        for master, asignatura, horas in duraciones:
+            duration_maps[master.id][asignatura.id] = horas
+
         master_data_cache = {}
         for master in all_masters:
-             # Búsqueda de los slides tipo 'sub_course' (Asignaturas) dentro del Master
-             # Estos contienen la duración OFICIAL para la ponderación académica.
-             master_slides = self.env['slide.slide'].search([
-                 ('channel_id', '=', master.id),
-                 ('slide_category', '=', 'sub_course')
-             ])
-             
-             # Mapa: ID del Canal Asignatura -> Duración (Slide)
-             # Esto permite buscar rápido la duración de una asignatura dado su canal_id
-             duration_map = {s.asignatura_id.id: s.completion_time for s in master_slides if s.asignatura_id}
-             
+             duration_map = duration_maps[master.id]
              total_horas = sum(duration_map.values())
              master_data_cache[master.id] = {
                  'asignaturas': master.asignatura_ids, # Mantenemos referencia para iterar
@@ -378,6 +671,25 @@ class SlideChannelPartner(models.Model):
             
             record.nota_final = round(nota_acumulada, 2)
 
+    def _get_medias_evaluables_sql(self):
+        """ Media de nota_evaluacion por inscripción sobre contenidos evaluables y publicados (una consulta) """
+        # Volcamos a BD los cambios pendientes antes de agregar en SQL
+        self.env['slide.slide.partner'].flush_model(['channel_partner_id', 'slide_id', 'nota_evaluacion'])
+        self.env['slide.slide'].flush_model(['es_evaluable', 'is_published', 'active'])
+
+        # Mismo criterio que evaluaciones_ids (contenido publicado) + filtro 'es_evaluable'
+        self.env.cr.execute("""
+            SELECT ssp.channel_partner_id, AVG(ssp.nota_evaluacion)
+              FROM slide_slide_partner ssp
+              JOIN slide_slide s ON s.id = ssp.slide_id
+             WHERE ssp.channel_partner_id = ANY(%s)
+               AND s.active
+               AND s.is_published
+               AND s.es_evaluable
+          GROUP BY ssp.channel_partner_id
+        """, [self.ids])
+        return {channel_partner_id: media or 0.0 for channel_partner_id, media in self.env.cr.fetchall()}
+
     def accion_cerrar_acta(self):
         """ Cierra la nota final del curso/asignatura y dispara la certificación si procede """
         for record in self:
@@ -434,157 +746,231 @@ class SlideChannelPartner(models.Model):
         # Por ahora, el comportamiento estándar del botón es "Aprobar emisión".
         return
 
+    # CRONs que consumen la cola de títulos en paralelo: ir.cron nunca ejecuta dos veces a la vez
+    # el mismo registro, así que cada worker adicional es un registro propio (data/ir_cron.xml).
+    # El primero es el principal: es el único que reparte trabajo a los demás.
+    CRONES_EMISION_TITULOS = (
+        'elearning_universidad.ir_cron_emitir_titulos_pendientes',
+        'elearning_universidad.ir_cron_emitir_titulos_pendientes_2',
+        'elearning_universidad.ir_cron_emitir_titulos_pendientes_3',
+    )
+
     @api.model
-    def _cron_emitir_titulos_pendientes(self):
-        """ CRON para emitir títulos de alumnos aptos de forma asíncrona y generar PDF """
-        inscripciones = self.search([
+    def _get_dominio_cola_titulos(self):
+        """ Inscripciones en la cola de emisión (sin las que fallaron y esperan un reintento) """
+        return [
             ('estado_nota', '=', 'pendiente_certificar'),
-            ('titulo_emitido', '=', False)
-        ], limit=50) 
+            ('titulo_emitido', '=', False),
+            ('error_emision_titulo', '=', False),
+        ]
+
+    @api.model
+    def _disparar_emision_titulos(self, chunk_size=50):
+        """ Dispara los workers de emisión necesarios para la cola (un lote por worker, hasta CRONES_EMISION_TITULOS) """
+        lotes = -(-self.search_count(self._get_dominio_cola_titulos()) // chunk_size)
+        for xmlid in self.CRONES_EMISION_TITULOS[1:lotes]:
+            cron = self.env.ref(xmlid, raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+
+    @api.model
+    def _cron_emitir_titulos_pendientes(self, chunk_size=50, tiempo_max=240, repartir=True):
+        """ CRON para emitir títulos de alumnos aptos de forma asíncrona y generar PDF.
+
+        La cola se consume por lotes reclamados con FOR UPDATE SKIP LOCKED. El CRON principal
+        (repartir=True) dispara al empezar los workers adicionales que hagan falta, que corren en
+        paralelo sin pisarse. Cada lote confirma su propia transacción. Los títulos que fallan
+        guardan el error y salen de la cola hasta que un administrador los reintenta.
+        Las métricas de cada ejecución se guardan en slide.channel.emision.
+        """
+        inicio = time.monotonic()
+        fecha_inicio = fields.Datetime.now()
+        testing = getattr(threading.current_thread(), 'testing', False)
+        if repartir:
+            # Reparto de la cola entre los workers de emisión (se ejecutan en otros procesos)
+            self._disparar_emision_titulos(chunk_size)
+        emitidos = 0
+        fallidos = 0
+        surveys_cache = {} # channel_id -> (survey, question): resuelto UNA vez por curso
+
+        cola_vacia = False
+        while time.monotonic() - inicio < tiempo_max:
+            inscripciones = self._reclamar_lote_titulos(chunk_size)
+            if not inscripciones:
+                cola_vacia = True
+                break
+
+            # FASE 0: Surveys "wrapper" de los cursos del lote, fuera del savepoint de cada título
+            # (si uno de ellos hace rollback, el wrapper creado no desaparece con él)
+            for channel in inscripciones.channel_id:
+                if channel.id in surveys_cache:
+                    continue
+                try:
+                    with self.env.cr.savepoint():
+                        surveys_cache[channel.id] = channel._get_survey_titulo()
+                except Exception as e:
+                    _logger.error(f"Error preparando el survey del título del curso {channel.id}: {str(e)}")
+
+            # FASE 1: Certificaciones (survey.user_input) de todo el lote
+            preparadas = {}
+            for inscripcion in inscripciones:
+                try:
+                    # Savepoint: un fallo no aborta la transacción del resto del lote
+                    with self.env.cr.savepoint():
+                        preparadas[inscripcion] = inscripcion._preparar_certificacion(surveys_cache)
+                except Exception as e:
+                    inscripcion._registrar_error_titulo(e)
+                    fallidos += 1
+
+            # FASE 2: Render y adjunto de cada título (un savepoint por título)
+            for inscripcion, user_input in preparadas.items():
+                try:
+                    with self.env.cr.savepoint():
+                        inscripcion._adjuntar_titulo(user_input, inscripcion._render_titulo_pdf(user_input))
+                    emitidos += 1
+                except Exception as e:
+                    inscripcion._registrar_error_titulo(e)
+                    fallidos += 1
+                    user_input.sudo().unlink()
+
+            # Confirmamos el lote: libera los bloqueos y hace visible el avance a otros workers
+            if not testing:
+                self.env.cr.commit()
+
+        # Presupuesto de tiempo agotado con trabajo pendiente: re-disparamos el CRON principal
+        # (que vuelve a repartir) sin esperar al intervalo
+        if not cola_vacia:
+            self.env.ref(self.CRONES_EMISION_TITULOS[0]).sudo()._trigger()
+
+        duracion = time.monotonic() - inicio
+        metricas = {
+            'emitidos': emitidos,
+            'fallidos': fallidos,
+            'titulos_minuto': round(emitidos / (duracion / 60.0), 2) if duracion > 0 else 0.0,
+        }
+        _logger.info(
+            "Emisión de títulos: %(emitidos)s emitidos, %(fallidos)s fallidos (%(titulos_minuto)s títulos/minuto)",
+            metricas
+        )
+        if emitidos or fallidos:
+            self.env['slide.channel.emision'].sudo().create({
+                'fecha_inicio': fecha_inicio,
+                'duracion': round(duracion, 2),
+                'worker': 'principal' if repartir else 'adicional',
+                **metricas,
+            })
+            if not testing:
+                self.env.cr.commit()
+        return metricas
+
+    def _registrar_error_titulo(self, error):
+        """ Guarda el error de emisión: la inscripción sale de la cola hasta que se reintente """
+        self.ensure_one()
+        _logger.error(f"Error generando título para {self.id}: {str(error)}")
+        self.sudo().write({'error_emision_titulo': str(error) or error.__class__.__name__})
+
+    def action_reintentar_emision_titulo(self):
+        """ Devuelve a la cola los títulos cuya emisión falló y dispara el CRON """
+        if 'admin' not in self.env.user._get_roles_universidad():
+            raise ValidationError("Solo los administradores pueden reintentar la emisión de títulos.")
+        self.filtered('error_emision_titulo').sudo().write({'error_emision_titulo': False})
+        self.env.ref(self.CRONES_EMISION_TITULOS[0]).sudo()._trigger()
+
+    @api.model
+    def _reclamar_lote_titulos(self, limite):
+        """ Reclama (bloquea) un lote de la cola de títulos saltando las filas que ya procesa otro worker """
+        self.flush_model(['estado_nota', 'titulo_emitido', 'error_emision_titulo', 'active'])
+        self.env.cr.execute(self._sql_reclamar_lote_titulos(limite))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _sql_reclamar_lote_titulos(self, limite):
+        """ Consulta de reclamación de lotes (usa el índice parcial slide_channel_partner_cola_titulos_idx) """
+        return SQL(f"""
+            SELECT id
+              FROM slide_channel_partner
+             WHERE {self._PREDICADO_COLA_TITULOS}
+               AND error_emision_titulo IS NULL
+               AND active
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, limite)
+
+    def _get_survey_titulo(self, surveys_cache):
+        """ Survey "wrapper" del título del curso y su pregunta puntuable (cacheado por curso) """
+        self.ensure_one()
+        channel = self.channel_id
+        survey, question = surveys_cache.get(channel.id, (None, None))
+        # Un rollback (savepoint de otro título) puede haber borrado los registros cacheados
+        if survey is None or not survey.exists() or not question.exists():
+            surveys_cache[channel.id] = channel._get_survey_titulo()
+        return surveys_cache[channel.id]
+
+    def _preparar_certificacion(self, surveys_cache):
+        """ Crea el survey.user_input finalizado que alimenta la plantilla del título """
+        self.ensure_one()
+        inscripcion = self
+
+        # ESTRATEGIA: Las plantillas de certificación de Odoo esperan un objeto 'survey.user_input'.
+        # Creamos un survey.user_input REAL (más seguro para persistencia) sobre un survey "wrapper"
+        # del curso, con el layout seleccionado en el curso ('plantilla_titulo').
+        survey, question = inscripcion._get_survey_titulo(surveys_cache)
+
+        # 1. Creamos el input finalizado
+        user_input = self.env['survey.user_input'].sudo().create({
+            'survey_id': survey.id,
+            'partner_id': inscripcion.partner_id.id,
+            'state': 'done',
+        })
+
+        # 2. Crear línea de respuesta para forzar la nota de forma natural
+        self.env['survey.user_input.line'].sudo().create({
+            'user_input_id': user_input.id,
+            'question_id': question.id,
+            'answer_type': 'numerical_box',
+            'value_numerical_box': inscripcion.nota_final, # Ej. 8.5
+            'answer_score': inscripcion.nota_final # Esto Odoo lo usa para sumar
+        })
         
-        for inscripcion in inscripciones:
-            try:
-                # 1. Generar PDF usando el layout seleccionado en el curso
-                layout = inscripcion.channel_id.plantilla_titulo or 'modern_gold'
-                
-                # Creamos un survey.user_input FAKE o usamos uno existente si hubiera
-                # Pero para simplificar, usaremos el motor de reportes de Survey directamente si es posible,
-                # o simularemos los datos que espera la plantilla.
-                # Las plantillas de certificación de Odoo esperan un objeto 'survey.user_input'.
-                # Si no tenemos uno real (porque es un Master sin examen final tipo survey), debemos crear uno dummy
-                # o adaptar la llamada.
-                
-                # ESTRATEGIA: Crear un registro dummy en survey.user_input asociado a una certificación "virtual"
-                # O reutilizar el mecanismo de renderizado. 
-                # Para ser robustos y usar el estándar, crearemos un input temporal asociado a los datos del curso.
-                
-                # Problema: Necesitamos un survey_id. 
-                # Solución: Si el curso tiene un slide tipo 'certification', usamos ese survey.
-                # Si NO (ej. un Master calificado por asignaturas), necesitamos una "Certificación Genérica" o crear el PDF manualmente.
-                # EL USUARIO DIJO: "ya en las opciones del curso seleccione emitir titulo y seleccione la plantilla".
-                # Odoo por defecto asocia la plantilla AL SURVEY. Si el usuario lo seleccionó EN EL CURSO, 
-                # es un custom field nuestro 'plantilla_titulo'.
-                
-                # Vamos a usar el report 'survey.certification_report' pasando IDs de slide.channel.partner
-                # PERO ese reporte espera 'survey.user_input'.
-                # TRAMPA: Heredaremos o crearemos un reporte propio que acepte slide.channel.partner?
-                # NO. El usuario quiere "usar las plantillas de certificados".
-                
-                # OPCIÓN VIABLE: Renderizar la plantilla QWEB directamente pasando los valores en 'docs'.
-                # Las plantillas qweb de survey (ej. survey_certification_report_view.xml) usan 'user_input' como variable.
-                # Podemos pasar un objeto Mock que tenga los campos que la plantilla usa (partner_id, scoring_percentage, test_entry, etc.)
-                
-                # MOCK CLASS local para engañar a la plantilla QWeb
-                class CertificationMock:
-                    def __init__(self, partner, channel, score, date, layout):
-                        self.partner_id = partner
-                        self.scoring_percentage = score * 10 # Sobre 100
-                        self.scoring_total = 100
-                        self.survey_id = type('obj', (object,), {'title': channel.name, 'certification_report_layout': layout})
-                        self.test_entry = False # Para que no salga "Test"
-                        self.create_date = date
-                        self.user_input_line_ids = [] # Sin respuestas detalladas
-                        
-                mock_input = CertificationMock(
-                    inscripcion.partner_id, 
-                    inscripcion.channel_id, 
-                    inscripcion.nota_final, 
-                    fields.Datetime.now(),
-                    layout
-                )
-                
-                # Renderizar PDF (Binario)
-                # Odoo 16/17 usa _render_qweb_pdf. El nombre del report externo suele ser 'survey.certification_report'.
-                # Pero al pasar un objeto custom, la llamada estándar ir.actions.report no funcionará directo con IDs.
-                # Debemos renderizar el HTML y luego PDF.
-                
-                # HACK MEJORADO: ¿Y si creamos un survey.user_input REAL?
-                # Es más seguro para persistencia.
-                # 1. Buscamos/Creamos un survey "wrapper" para el título del Master (si no existe)
-                # 1. Buscamos/Creamos un survey "wrapper" para el título del Master (si no existe)
-                # Usamos el nombre exacto del curso para que en el certificado salga bien (ej. "Master en Data Science")
-                survey_title = inscripcion.channel_id.name
-                survey = self.env['survey.survey'].sudo().search([('title', '=', survey_title)], limit=1)
-                
-                if not survey:
-                    survey = self.env['survey.survey'].sudo().create({
-                        'title': survey_title,
-                        'certification': True,
-                        'scoring_type': 'scoring_without_answers', # Odoo a veces re-computa
-                        'certification_report_layout': layout,
-                        'scoring_success_min': 0.0, 
-                    })
-                
-                # HACK: Asegurar que el survey tenga AL MENOS una pregunta puntuable, 
-                # de lo contrario scoring_percentage siempre será 0 (Odoo lo calcula sobre el total de puntos posibles)
-                # Si el survey es nuevo o no tiene preguntas, creamos una oculta.
-                if not survey.question_ids:
-                    self.env['survey.question'].sudo().create({
-                        'survey_id': survey.id,
-                        'title': 'Nota de Expediente',
-                        'question_type': 'numerical_box',
-                        'answer_score': 10.0, # Max score 10
-                        'is_scored_question': True,
-                        'sequence': 0,
-                    })
-
-                # Asegurar que el layout es el correcto si cambiaron la configuración
-                if survey.certification_report_layout != layout:
-                    survey.write({'certification_report_layout': layout})
-
-                # 2. Creamos el input finalizado
-                user_input = self.env['survey.user_input'].sudo().create({
-                    'survey_id': survey.id,
-                    'partner_id': inscripcion.partner_id.id,
-                    'state': 'done',
-                })
-
-                # 3. Crear línea de respuesta para forzar la nota de forma natural
-                # Buscamos la pregunta puntuable (la que acabamos de crear o la que hubiera)
-                question = survey.question_ids[0]
-                self.env['survey.user_input.line'].sudo().create({
-                    'user_input_id': user_input.id,
-                    'question_id': question.id,
-                    'answer_type': 'numerical_box',
-                    'value_numerical_box': inscripcion.nota_final, # Ej. 8.5
-                    'answer_score': inscripcion.nota_final # Esto Odoo lo usa para sumar
-                })
-                
-                # Forzamos Success por seguridad (aunque el min=0 debería bastar) y recalcualamos
-                # Odoo debería calcular scoring_percentage = (8.5 / 10) * 100 = 85.0
-                user_input.write({'scoring_success': True})
-                
-                # 3. Generar PDF (Con contexto de IDIOMA del alumno)
-                # Importante: Pasar el contexto en la llamada
-                pdf_content, _ = self.env['ir.actions.report'].with_context(lang=inscripcion.partner_id.lang).sudo()._render_qweb_pdf(
-                    'survey.certification_report', 
-                    [user_input.id],
-                    data={'report_type': 'pdf'}
-                )
-                
-                # 4. Adjuntar al registro de inscripción
-                filename = f"Titulo_{inscripcion.channel_id.name}_{inscripcion.partner_id.name}.pdf".replace(" ", "_")
-                attachment = self.env['ir.attachment'].create({
-                    'name': filename,
-                    'type': 'binary',
-                    'datas': base64.b64encode(pdf_content),
-                    'res_model': 'slide.channel.partner',
-                    'res_id': inscripcion.id,
-                    'mimetype': 'application/pdf'
-                })
-                
-                # 5. Guardar referencia y actualizar estado
-                inscripcion.sudo().write({
-                    'estado_nota': 'certificado',
-                    'titulo_emitido': True,
-                    'fecha_emision_titulo': fields.Datetime.now(),
-                    'survey_user_input_id': user_input.id 
-                })
-                
-            except Exception as e:
-                # Log error
-                _logger.error(f"Error generando título para {inscripcion.id}: {str(e)}")
-                continue
+        # Forzamos Success por seguridad (aunque el min=0 debería bastar) y recalcualamos
+        # Odoo debería calcular scoring_percentage = (8.5 / 10) * 100 = 85.0
+        user_input.write({'scoring_success': True})
+        return user_input
+
+    def _render_titulo_pdf(self, user_input):
+        """ Render individual del título (Con contexto de IDIOMA del alumno) """
+        self.ensure_one()
+        pdf_content, dummy = self.env['ir.actions.report'].with_context(lang=self.partner_id.lang).sudo()._render_qweb_pdf(
+            'survey.certification_report', 
+            [user_input.id],
+            data={'report_type': 'pdf'}
+        )
+        return pdf_content
+
+    def _adjuntar_titulo(self, user_input, pdf_content):
+        """ Adjunta el PDF del título a la inscripción y la marca como certificada """
+        self.ensure_one()
+        inscripcion = self
+
+        # 1. Adjuntar al registro de inscripción
+        filename = f"Titulo_{inscripcion.channel_id.name}_{inscripcion.partner_id.name}.pdf".replace(" ", "_")
+        self.env['ir.attachment'].create({
+            'name': filename,
+            'type': 'binary',
+            'datas': base64.b64encode(pdf_content),
+            'res_model': 'slide.channel.partner',
+            'res_id': inscripcion.id,
+            'mimetype': 'application/pdf'
+        })
+        
+        # 2. Guardar referencia y actualizar estado
+        inscripcion.sudo().write({
+            'estado_nota': 'certificado',
+            'titulo_emitido': True,
+            'fecha_emision_titulo': fields.Datetime.now(),
+            'survey_user_input_id': user_input.id 
+        })
 
     def action_download_certificate(self):
         """ Acción para descargar el certificado PDF adjunto """
@@ -619,7 +1005,7 @@ class SlideChannelPartner(models.Model):
     def action_regenerate_certificate(self):
         """ Permite a un administrador regenerar el título si hubo un error """
         self.ensure_one()
-        if not self.env.user.has_group('elearning_universidad.grupo_administrador_universidad'):
+        if 'admin' not in self.env.user._get_roles_universidad():
              raise ValidationError("Solo los administradores pueden regenerar títulos.")
         
         # Eliminamos adjuntos previos de tipo PDF para evitar confusión
@@ -642,7 +1028,8 @@ class SlideChannelPartner(models.Model):
         self.write({
             'titulo_emitido': False,
             'estado_nota': 'pendiente_certificar',
-            'fecha_emision_titulo': False
+            'fecha_emision_titulo': False,
+            'error_emision_titulo': False
         })
         
         return {
@@ -658,9 +1045,8 @@ class SlideChannelPartner(models.Model):
     def action_open_gradebook_form(self):
         """ Abre la vista formulario de esta inscripción específica (usado en botones) """
         self.ensure_one()
-        # ASEGURAR INTEGRIDAD: Antes de abrir, generamos/reparamos los registros de evaluación
-        self._ensure_evaluacion_records()
-        
+        # La integridad de los registros de evaluación la garantizan la matrícula, el alta de contenidos,
+        # el CRON de reparación y la acción de servidor (ver _ensure_evaluacion_records).
         return {
             'type': 'ir.actions.act_window',
             'name': 'Evaluación de Asignatura', # Título explícito
@@ -672,38 +1058,103 @@ class SlideChannelPartner(models.Model):
             'context': {'create': False, 'edit': True},
         }
 
+    # Contenidos que se muestran en el boletín aunque no sean evaluables
+    CATEGORIAS_BOLETIN = ('exam', 'delivery', 'certification', 'sub_course')
+
     def _ensure_evaluacion_records(self):
-        """ Genera o repara registros de slide.slide.partner para todos los contenidos evaluables """
-        SlideSlidePartner = self.env['slide.slide.partner'].sudo()
-        Slide = self.env['slide.slide'].sudo()
-        
-        for record in self:
-            # 1. Obtener todos los contenidos RELEVANTES del curso (Evaluables O Tipos especiales)
-            # El usuario quiere ver Entregables/Exámenes en la lista aunque no cuenten para nota.
-            evaluable_slides = Slide.search([
-                ('channel_id', '=', record.channel_id.id),
-                ('is_published', '=', True),
-                '|', ('es_evaluable', '=', True), ('slide_category', 'in', ['exam', 'delivery', 'certification', 'sub_course'])
-            ])
-            
-            for slide in evaluable_slides:
-                # 2. Buscar si ya existe un registro de progreso para este usuario y slide
-                progress = SlideSlidePartner.search([
-                    ('slide_id', '=', slide.id),
-                    ('partner_id', '=', record.partner_id.id)
-                ], limit=1)
-                
-                if progress:
-                    # CASO A: Existe pero no está enlazado a nuestra inscripción (channel_partner_id perdidos)
-                    if not progress.channel_partner_id:
-                        progress.channel_partner_id = record.id
-                else:
-                    # CASO B: No existe (el alumno no ha entrado aún). Creamos placeholder.
-                    SlideSlidePartner.create({
-                        'slide_id': slide.id,
-                        'partner_id': record.partner_id.id,
-                        'channel_id': record.channel_id.id,
-                        'channel_partner_id': record.id,
-                        'estado_evaluacion': 'pendiente_presentar',
-                        # Importante: No marcar como completado ni visitado
-                    })
+        """ Genera o repara en lote los registros de slide.slide.partner de una cohorte de inscripciones """
+        inscripciones = self.filtered('id')
+        if not inscripciones:
+            return 0
+
+        self.env['slide.slide.partner'].flush_model(['slide_id', 'partner_id', 'channel_id', 'channel_partner_id'])
+        self.env['slide.slide'].flush_model(['channel_id', 'is_published', 'es_evaluable', 'slide_category', 'active'])
+        self.flush_recordset(['channel_id', 'partner_id'])
+
+        # Contenidos RELEVANTES del curso (Evaluables O Tipos especiales) publicados.
+        # El usuario quiere ver Entregables/Exámenes en la lista aunque no cuenten para nota.
+        filtro_slides = """
+               s.active
+           AND s.is_published
+           AND (s.es_evaluable OR s.slide_category IN %(categorias)s)
+        """
+        params = {'ids': inscripciones.ids, 'categorias': self.CATEGORIAS_BOLETIN}
+
+        # 1. CASO A: Existen pero no están enlazados a su inscripción (channel_partner_id perdidos).
+        # Reparación con un único UPDATE.
+        self.env.cr.execute(f"""
+            UPDATE slide_slide_partner ssp
+               SET channel_partner_id = scp.id
+              FROM slide_channel_partner scp, slide_slide s
+             WHERE scp.id = ANY(%(ids)s)
+               AND ssp.channel_partner_id IS NULL
+               AND ssp.partner_id = scp.partner_id
+               AND s.id = ssp.slide_id
+               AND s.channel_id = scp.channel_id
+               AND {filtro_slides}
+        """, params)
+        if self.env.cr.rowcount:
+            self.env['slide.slide.partner'].invalidate_model(['channel_partner_id'])
+            inscripciones.invalidate_recordset(['evaluaciones_ids'])
+            # Los registros re-enlazados cuentan ahora para la media del acta
+            self.env.add_to_compute(self._fields['nota_final'], inscripciones)
+
+        # 2. CASO B: No existen (el alumno no ha entrado aún). Anti-join sobre el índice único (slide_id, partner_id).
+        self.env.cr.execute(f"""
+            SELECT s.id, scp.partner_id, scp.channel_id, scp.id
+              FROM slide_channel_partner scp
+              JOIN slide_slide s ON s.channel_id = scp.channel_id
+             WHERE scp.id = ANY(%(ids)s)
+               AND {filtro_slides}
+               AND NOT EXISTS (
+                   SELECT 1
+                     FROM slide_slide_partner ssp
+                    WHERE ssp.slide_id = s.id
+                      AND ssp.partner_id = scp.partner_id
+               )
+        """, params)
+        vals_list = [{
+            'slide_id': slide_id,
+            'partner_id': partner_id,
+            'channel_id': channel_id,
+            'channel_partner_id': channel_partner_id,
+            'estado_evaluacion': 'pendiente_presentar',
+            # Importante: No marcar como completado ni visitado
+        } for slide_id, partner_id, channel_id, channel_partner_id in self.env.cr.fetchall()]
+
+        if vals_list:
+            self.env['slide.slide.partner'].sudo().create(vals_list)
+        return len(vals_list)
+
+    @api.model
+    def _cron_asegurar_registros_evaluacion(self, batch_size=5000, tiempo_max=240):
+        """ CRON para generar/reparar los registros de evaluación de las actas abiertas.
+
+        Recorre las inscripciones por id en páginas de batch_size (sin cargar la lista completa)
+        y confirma cada página. Si se agota el presupuesto de tiempo, se re-dispara a sí mismo.
+        """
+        inicio = time.monotonic()
+        testing = getattr(threading.current_thread(), 'testing', False)
+        ultimo_id = 0
+        procesadas = creados = 0
+        while True:
+            inscripciones = self.search(
+                [('estado_nota', '=', 'pendiente_revision'), ('id', '>', ultimo_id)],
+                order='id', limit=batch_size
+            )
+            if not inscripciones:
+                break
+            creados += inscripciones._ensure_evaluacion_records()
+            procesadas += len(inscripciones)
+            ultimo_id = inscripciones[-1].id
+            # Confirmamos la página: el trabajo hecho no se pierde si el CRON se interrumpe
+            if not testing:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+            if len(inscripciones) < batch_size:
+                break
+            if time.monotonic() - inicio >= tiempo_max:
+                # Queda trabajo: nueva ejecución en cuanto termine esta (las páginas ya reparadas no crean nada)
+                self.env.ref('elearning_universidad.ir_cron_asegurar_registros_evaluacion').sudo()._trigger()
+                break
+        _logger.info("Registros de evaluación: %s placeholders creados para %s inscripciones", creados, procesadas)
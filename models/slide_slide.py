@@ -1,5 +1,6 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index, drop_index
 
 class Slide(models.Model):
     _inherit = 'slide.slide'
@@ -30,6 +31,17 @@ class Slide(models.Model):
         help="Fecha en la que el contenido se publicará automáticamente."
     )
 
+    def init(self):
+        super().init()
+        # Índice parcial de la cola de publicación programada (_cron_publicar_slides_programados).
+        # is_published = False se escribe como lo compila el ORM para que la consulta implique el predicado
+        drop_index(self.env.cr, 'slide_slide_fecha_programada_idx', self._table)
+        create_index(
+            self.env.cr, 'slide_slide_programado_fecha_idx', self._table,
+            ['fecha_programada'],
+            where='fecha_programada IS NOT NULL AND (is_published IS NULL OR is_published = false)'
+        )
+
     # --- Campos Estadísticos Técnicos ---
     nbr_sub_course = fields.Integer(string='Número de Asignaturas', compute='_compute_slides_statistics', store=True, compute_sudo=True)
     nbr_delivery = fields.Integer(string='Número de Entregables', compute='_compute_slides_statistics', store=True, compute_sudo=True)
@@ -249,6 +261,17 @@ class Slide(models.Model):
                 
         return certification_urls
 
+    def action_descargar_entregas_zip(self):
+        """ Descarga en un ZIP (streaming) todas las entregas de este entregable """
+        self.ensure_one()
+        if self.slide_category != 'delivery':
+            raise ValidationError(_("Solo los entregables tienen entregas que descargar."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/universidad/entregas/{self.id}/zip',
+            'target': 'self',
+        }
+
     def action_publicar_contenido(self):
         """ Publica inmediatamente el contenido """
         for slide in self:
@@ -287,32 +310,68 @@ class Slide(models.Model):
         if self.env.context.get('avoid_recursive_sync'):
             return
 
-        for slide in self.filtered(lambda s: s.asignatura_id):
-            if slide.is_published:
-                slide.asignatura_id.sudo().with_context(avoid_slide_sync=True, avoid_recursive_sync=True).action_publicar()
-            elif slide.fecha_programada:
+        # Asignaturas a publicar: una sola llamada para todo el lote
+        publicadas = self.filtered(lambda s: s.asignatura_id and s.is_published).asignatura_id
+        if publicadas:
+            publicadas.sudo().with_context(avoid_slide_sync=True, avoid_recursive_sync=True).action_publicar()
+
+        for slide in self.filtered(lambda s: s.asignatura_id and not s.is_published):
+            if slide.fecha_programada:
                 slide.asignatura_id.sudo().with_context(avoid_slide_sync=True, avoid_recursive_sync=True).write({
                     'estado_universidad': 'programado',
                     'fecha_programada_publicacion': slide.fecha_programada
                 })
 
-    def _asegurar_registros_seguimiento(self):
-        """ Crea slide.slide.partner para todos los alumnos del curso si el contenido es evaluable """
+    def _asegurar_registros_seguimiento(self, partner_ids=None):
+        """ Crea slide.slide.partner para todos los alumnos del curso si el contenido es evaluable.
+
+        Con partner_ids solo se consideran esos alumnos (ej. una cohorte recién matriculada).
+        """
+        slides = self.filtered(lambda s: s.es_evaluable and s.channel_id)
+        if not slides:
+            return 0
         SlidePartner = self.env['slide.slide.partner'].sudo()
-        for slide in self.filtered(lambda s: s.es_evaluable and s.channel_id):
-            alumnos = slide.channel_id.channel_partner_ids.mapped('partner_id')
-            for alumno in alumnos:
-                existente = SlidePartner.search([
-                    ('slide_id', '=', slide.id),
-                    ('partner_id', '=', alumno.id)
-                ], limit=1)
-                if not existente:
-                    SlidePartner.create({
-                        'slide_id': slide.id,
-                        'partner_id': alumno.id,
-                        'channel_id': slide.channel_id.id,
-                        'estado_evaluacion': 'pendiente_presentar'
-                    })
+
+        # 1. Pares REQUERIDOS: alumnos de cada curso (lectura en lote de las inscripciones)
+        if partner_ids is None:
+            alumnos_por_canal = {
+                canal.id: set(canal.channel_partner_ids.partner_id.ids)
+                for canal in slides.channel_id.sudo()
+            }
+        else:
+            alumnos_por_canal = {canal_id: set() for canal_id in slides.channel_id.ids}
+            for canal, partner in self.env['slide.channel.partner'].sudo()._read_group([
+                ('channel_id', 'in', slides.channel_id.ids),
+                ('partner_id', 'in', list(partner_ids)),
+                ('member_status', '!=', 'invited'),
+            ], groupby=['channel_id', 'partner_id']):
+                alumnos_por_canal[canal.id].add(partner.id)
+        todos_alumnos = set().union(*alumnos_por_canal.values())
+        if not todos_alumnos:
+            return 0
+
+        # 2. Pares EXISTENTES en una sola consulta (índice único slide_id, partner_id)
+        existentes = {
+            (slide.id, partner.id)
+            for slide, partner in SlidePartner._read_group(
+                [('slide_id', 'in', slides.ids), ('partner_id', 'in', list(todos_alumnos))],
+                groupby=['slide_id', 'partner_id']
+            )
+        }
+
+        # 3. Diferencia en memoria + inserción masiva de los que faltan
+        vals_list = [{
+            'slide_id': slide.id,
+            'partner_id': partner_id,
+            'channel_id': slide.channel_id.id,
+            'estado_evaluacion': 'pendiente_presentar'
+        } for slide in slides
+          for partner_id in sorted(alumnos_por_canal[slide.channel_id.id])
+          if (slide.id, partner_id) not in existentes]
+
+        if vals_list:
+            SlidePartner.create(vals_list)
+        return len(vals_list)
 
     @api.onchange('asignatura_id')
     def _onchange_asignatura_id(self):
@@ -358,6 +417,7 @@ class Slide(models.Model):
         slides._asegurar_registros_seguimiento()
         slides._sincronizar_asignatura_master() # Primero vinculamos al Master (para cumplir requisitos)
         slides._propagar_publicacion_asignatura() # Luego intentamos publicar
+        slides._armar_publicacion_programada()
         return slides
 
     def write(self, vals):
@@ -371,6 +431,10 @@ class Slide(models.Model):
         
         if any(k in vals for k in ['is_published', 'fecha_programada', 'asignatura_id']):
             self._propagar_publicacion_asignatura()
+
+        # Publicación programada: armamos el CRON para la hora exacta
+        if vals.get('fecha_programada'):
+            self._armar_publicacion_programada()
         
         if 'asignatura_id' in vals or 'channel_id' in vals:
             self._sincronizar_asignatura_master() # Nuevo
@@ -413,19 +477,45 @@ class Slide(models.Model):
 
     @api.model
     def _cron_publicar_slides_programados(self):
-        """ CRON para publicar contenidos cuya fecha programada haya llegado """
+        """ CRON para publicar contenidos cuya fecha programada haya llegado.
+
+        Publica todos los contenidos vencidos con una sola escritura y se re-programa
+        para la siguiente fecha exacta (ir.cron._trigger).
+        """
         slides = self.search([
             ('is_published', '=', False),
             ('fecha_programada', '!=', False),
             ('fecha_programada', '<=', fields.Datetime.now())
         ])
-        for slide in slides:
+        if slides:
             # Publicación asíncrona vía CRON
-            slide.sudo().write({
+            slides.sudo().write({
                 'is_published': True,
                 'date_published': fields.Datetime.now(),
                 'fecha_programada': False # Limpiamos para no re-procesar
             })
+        self._programar_siguiente_publicacion()
+
+    @api.model
+    def _armar_publicacion_programada(self):
+        """ Dispara el CRON en las fechas de los contenidos de self aún sin publicar y programados a futuro """
+        ahora = fields.Datetime.now()
+        fechas = self.filtered(
+            lambda s: not s.is_published and s.fecha_programada and s.fecha_programada > ahora
+        ).mapped('fecha_programada')
+        if fechas:
+            self._programar_siguiente_publicacion(fechas=sorted(set(fechas)))
+
+    def _programar_siguiente_publicacion(self, fechas=None):
+        """ Dispara el CRON de publicación en la fecha programada más próxima (o en las fechas dadas) """
+        if fechas is None:
+            siguiente = self.sudo().search([
+                ('is_published', '=', False),
+                ('fecha_programada', '>', fields.Datetime.now())
+            ], order='fecha_programada', limit=1)
+            fechas = siguiente.mapped('fecha_programada')
+        if fechas:
+            self.env.ref('elearning_universidad.ir_cron_publicar_slides_programados').sudo()._trigger(at=fechas)
 
     @api.depends('asignatura_id')
     def _compute_website_url(self):
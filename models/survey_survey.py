@@ -47,9 +47,8 @@ class Survey(models.Model):
     def _check_certification_permission(self):
         """ Impide que los docentes creen certificaciones (Solo Admins/Directores) """
         user = self.env.user
-        if user.has_group('elearning_universidad.grupo_personal_docente') and \
-           not user.has_group('elearning_universidad.grupo_director_academico') and \
-           not user.has_group('elearning_universidad.grupo_administrador_universidad'):
+        roles = user._get_roles_universidad()
+        if 'docente' in roles and not roles & {'director', 'admin'}:
             raise ValidationError("Solo los Directores Académicos o Administradores pueden crear Certificaciones.")
 
     # --- Ayuda para Dominios XML ---
@@ -60,11 +59,11 @@ class Survey(models.Model):
     )
 
     def _compute_is_university_admin(self):
-        is_admin = self.env.user.has_group('elearning_universidad.grupo_administrador_universidad')
+        is_admin = 'admin' in self.env.user._get_roles_universidad()
         for record in self:
             record.is_university_admin = is_admin
 
     def _search_is_university_admin(self, operator, value):
-        if self.env.user.has_group('elearning_universidad.grupo_administrador_universidad'):
+        if 'admin' in self.env.user._get_roles_universidad():
             return [(1, '=', 1)] # Mostrar todo si es admin
         return [(0, '=', 1)] # No mostrar nada extra si no es admin (se aplican el resto de filtros)
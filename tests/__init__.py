@@ -0,0 +1,10 @@
+from . import test_slide_channel_staff
+from . import test_portal_notas
+from . import test_registros_seguimiento
+from . import test_matricula_cohorte
+from . import test_emision_titulos
+from . import test_all_personal_docente
+from . import test_catalogo_web
+from . import test_indices_colas
+from . import test_requisitos_publicacion
+from . import test_notificaciones
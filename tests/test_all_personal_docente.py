@@ -0,0 +1,111 @@
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAllPersonalDocente(TransactionCase):
+    """ all_personal_docente_ids: mantenimiento incremental y verificador/reparador de la relación """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        director = new_test_user(
+            cls.env, 'director_docentes',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        grupos = [(6, 0, [
+            cls.env.ref('base.group_user').id,
+            cls.env.ref('elearning_universidad.grupo_personal_docente').id,
+        ])]
+        cls.docentes = cls.env['res.users'].create([{
+            'name': f'Docente {index}',
+            'login': f'docente_relacion_{index}',
+            'groups_id': grupos,
+        } for index in range(101)])
+        cls.nuevo_docente = cls.docentes[-1]
+        docentes = cls.docentes[:-1]
+        # Master grande (30 asignaturas, 100 docentes) y Master pequeño (3 asignaturas, 10 docentes)
+        cls.master_grande = cls._crear_master('Grande', director, docentes, asignaturas=30)
+        cls.master_pequeno = cls._crear_master('Pequeño', director, docentes[:10], asignaturas=3)
+
+    @classmethod
+    def _crear_master(cls, nombre, director, docentes, asignaturas):
+        Channel = cls.env['slide.channel']
+        master = Channel.create({
+            'name': f'Master {nombre}',
+            'tipo_curso': 'master',
+            'director_academico_ids': [(6, 0, director.ids)],
+        })
+        por_asignatura = -(-len(docentes) // asignaturas)
+        Channel.create([{
+            'name': f'Asignatura {nombre} {index}',
+            'tipo_curso': 'asignatura',
+            'master_id': master.id,
+            'personal_docente_ids': [(6, 0, docentes[
+                (index * por_asignatura) % len(docentes):(index * por_asignatura) % len(docentes) + por_asignatura
+            ].ids)],
+        } for index in range(asignaturas)])
+        return master
+
+    def _filas(self, cursos):
+        """ Pares (curso, docente) almacenados en la relación para los cursos """
+        self.env.flush_all()
+        self.env.cr.execute(
+            "SELECT channel_id, user_id FROM slide_channel_all_docentes_rel WHERE channel_id = ANY(%s)",
+            [cursos.ids]
+        )
+        return set(self.env.cr.fetchall())
+
+    def _consultas_alta_docente(self, master):
+        """ Consultas de añadir un docente al Master (incluida la escritura en base de datos) """
+        self.env.flush_all()
+        self.env.invalidate_all()
+        inicio = self.cr.sql_log_count
+        master.write({'personal_docente_ids': [(4, self.nuevo_docente.id)]})
+        self.env.flush_all()
+        return self.cr.sql_log_count - inicio
+
+    def test_alta_incremental(self):
+        cursos = self.master_grande | self.master_grande.asignatura_ids
+        self.assertEqual(len(cursos), 31)
+        antes = self._filas(cursos)
+        self.assertEqual({user_id for dummy, user_id in antes}, set(self.docentes[:-1].ids))
+
+        # Calentamiento de cachés (ormcache de grupos y roles) antes de medir
+        self.master_pequeno.write({'personal_docente_ids': [(4, self.nuevo_docente.id)]})
+        self.master_pequeno.write({'personal_docente_ids': [(3, self.nuevo_docente.id)]})
+        consultas_pequeno = self._consultas_alta_docente(self.master_pequeno)
+        consultas_grande = self._consultas_alta_docente(self.master_grande)
+
+        # Solo se insertan las filas del nuevo docente: el Master y sus 30 asignaturas
+        self.assertEqual(self._filas(cursos), antes | {(curso.id, self.nuevo_docente.id) for curso in cursos})
+        # Mismas consultas con 30 asignaturas y 100 docentes que con 3 asignaturas y 10 docentes
+        self.assertEqual(consultas_grande, consultas_pequeno)
+
+        # Baja: solo desaparecen esas filas
+        self.master_grande.write({'personal_docente_ids': [(3, self.nuevo_docente.id)]})
+        self.assertEqual(self._filas(cursos), antes)
+
+    def test_verificar_y_reparar(self):
+        Channel = self.env['slide.channel']
+        Channel._verificar_all_personal_docente(reparar=True)
+        self.assertEqual(Channel._verificar_all_personal_docente(), {'faltantes': 0, 'sobrantes': 0})
+
+        cursos = self.master_grande | self.master_grande.asignatura_ids
+        correctas = self._filas(cursos)
+        # Deriva: se pierden las filas de una asignatura y aparece una fila que no corresponde
+        asignatura = self.master_grande.asignatura_ids[0]
+        perdidas = {fila for fila in correctas if fila[0] == asignatura.id}
+        self.env.cr.execute("DELETE FROM slide_channel_all_docentes_rel WHERE channel_id = %s", [asignatura.id])
+        self.env.cr.execute(
+            "INSERT INTO slide_channel_all_docentes_rel (channel_id, user_id) VALUES (%s, %s)",
+            [self.master_pequeno.id, self.nuevo_docente.id]
+        )
+        self.env.invalidate_all()
+
+        self.assertEqual(
+            Channel._verificar_all_personal_docente(reparar=True),
+            {'faltantes': len(perdidas), 'sobrantes': 1}
+        )
+        self.assertEqual(Channel._verificar_all_personal_docente(), {'faltantes': 0, 'sobrantes': 0})
+        self.assertEqual(self._filas(cursos), correctas)
+        self.assertNotIn(self.nuevo_docente, self.master_pequeno.all_personal_docente_ids)
@@ -0,0 +1,88 @@
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestCatalogoWeb(TransactionCase):
+    """ /slides/all: el conteo (paginador) y el listado de la búsqueda web excluyen las asignaturas """
+
+    OPCIONES_BUSQUEDA = {
+        'displayDescription': True,
+        'displayDetail': False,
+        'displayExtraDetail': False,
+        'displayExtraLink': False,
+        'displayImage': False,
+        'allowFuzzy': False,
+        'my': False,
+        'tag': None,
+        'slide_category': None,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.administrador = new_test_user(
+            cls.env, 'admin_catalogo',
+            groups='base.group_user,elearning_universidad.grupo_administrador_universidad'
+        )
+        cls.director = new_test_user(
+            cls.env, 'director_catalogo',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        cls.masters = cls.env['slide.channel'].create([{
+            'name': f'CatalogoPrueba Master {index}',
+            'tipo_curso': 'master',
+            'director_academico_ids': [(6, 0, cls.director.ids)],
+        } for index in range(10)])
+        cls.masters.with_user(cls.administrador).action_publicar()
+        cls._crear_asignaturas(cls.masters, 10)
+        cls.website = cls.env['website'].get_current_website()
+
+    @classmethod
+    def _crear_asignaturas(cls, masters, por_master):
+        """ Crea y publica por_master asignaturas en cada Master """
+        asignaturas = cls.env['slide.channel'].create([{
+            'name': f'CatalogoPrueba Asignatura {master.id}-{index}',
+            'tipo_curso': 'asignatura',
+            'master_id': master.id,
+        } for master in masters for index in range(por_master)])
+        # Duración en el Master (requisito de publicación)
+        masters.slide_ids.write({'completion_time': 2.0})
+        asignaturas.with_user(cls.administrador).action_publicar()
+        return asignaturas
+
+    def _buscar(self, limite=12):
+        """ Misma búsqueda que el listado de /slides/all: (conteo, cursos de la página) """
+        count, detalles, dummy = self.website._search_with_fuzzy(
+            'slide_channels_only', 'CatalogoPrueba', limite, 'name asc', dict(self.OPCIONES_BUSQUEDA)
+        )
+        cursos = self.env['slide.channel'].concat(*(detalle['results'] for detalle in detalles))
+        return count, cursos
+
+    def test_conteo_sin_asignaturas(self):
+        self.assertEqual(
+            self.env['slide.channel'].search_count([
+                ('name', 'like', 'CatalogoPrueba'), ('tipo_curso', '=', 'asignatura'), ('estado_universidad', '=', 'publicado'),
+            ]), 100
+        )
+        count, cursos = self._buscar()
+        # El paginador cuenta solo los Masters, no las 100 asignaturas publicadas
+        self.assertEqual(count, 10)
+        self.assertEqual(cursos, self.masters.sorted('name'))
+
+    def test_consultas_constantes(self):
+        # Calentamiento de cachés (dominio del sitio web, reglas) antes de medir
+        self._buscar()
+        self.env.flush_all()
+        self.env.invalidate_all()
+        inicio = self.cr.sql_log_count
+        self._buscar()
+        consultas = self.cr.sql_log_count - inicio
+
+        # Diez veces más asignaturas: el filtro se resuelve en SQL, mismas consultas y mismo conteo
+        self._crear_asignaturas(self.masters, 100)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        with self.assertQueryCount(consultas):
+            count, cursos = self._buscar()
+        self.assertEqual(count, 10)
+        self.assertFalse(cursos.filtered(lambda curso: curso.tipo_curso == 'asignatura'))
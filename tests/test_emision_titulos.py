@@ -0,0 +1,99 @@
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestEmisionTitulos(TransactionCase):
+    """ _cron_emitir_titulos_pendientes: render individual, errores persistidos y métricas de la ejecución """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        director = new_test_user(
+            cls.env, 'director_titulos',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        cls.curso = cls.env['slide.channel'].create({
+            'name': 'Microcredencial Titulada',
+            'tipo_curso': 'microcredencial',
+            'director_academico_ids': [(6, 0, director.ids)],
+        })
+        cls.alumnos = cls.env['res.partner'].create([
+            {'name': f'Alumno Titulado {index}'} for index in range(10)
+        ])
+        cls.curso._action_add_members(cls.alumnos)
+        cls.inscripciones = cls.env['slide.channel.partner'].search([
+            ('channel_id', '=', cls.curso.id),
+            ('partner_id', 'in', cls.alumnos.ids),
+        ])
+        # Cola de emisión: estado calculado, se fija directamente en base de datos
+        cls.env.flush_all()
+        cls.env.cr.execute(
+            "UPDATE slide_channel_partner SET estado_nota = 'pendiente_certificar', nota_final = 8.5 WHERE id IN %s",
+            [tuple(cls.inscripciones.ids)]
+        )
+        cls.env.invalidate_all()
+
+    def _fallar_render(self, inscripcion):
+        """ Hace fallar el render del título de una inscripción mientras fallos['activo'] sea True """
+        SlideChannelPartner = type(self.env['slide.channel.partner'])
+        render_original = SlideChannelPartner._render_titulo_pdf
+        fallos = {'activo': True}
+
+        def _render_titulo_pdf(record, user_input):
+            if fallos['activo'] and record == inscripcion:
+                raise ValueError("Plantilla rota")
+            return render_original(record, user_input)
+
+        self.patch(SlideChannelPartner, '_render_titulo_pdf', _render_titulo_pdf)
+        return fallos
+
+    def test_emision_y_errores(self):
+        fallida = self.inscripciones[0]
+        self._fallar_render(fallida)
+
+        metricas = self.env['slide.channel.partner']._cron_emitir_titulos_pendientes(chunk_size=4)
+
+        self.assertEqual(metricas['emitidos'], 9)
+        self.assertEqual(metricas['fallidos'], 1)
+        emitidas = self.inscripciones - fallida
+        self.assertTrue(all(emitidas.mapped('titulo_emitido')))
+        self.assertEqual(set(emitidas.mapped('estado_nota')), {'certificado'})
+        self.assertEqual(
+            self.env['ir.attachment'].search_count([
+                ('res_model', '=', 'slide.channel.partner'),
+                ('res_id', 'in', emitidas.ids),
+            ]), 9
+        )
+
+        # El error queda guardado y la inscripción sale de la cola
+        self.assertIn("Plantilla rota", fallida.error_emision_titulo)
+        self.assertFalse(fallida.titulo_emitido)
+        self.assertFalse(fallida.survey_user_input_id)
+        Inscripcion = self.env['slide.channel.partner']
+        self.assertFalse(Inscripcion.search(Inscripcion._get_dominio_cola_titulos()) & self.inscripciones)
+        self.assertFalse(Inscripcion._reclamar_lote_titulos(50) & self.inscripciones)
+
+        ejecucion = self.env['slide.channel.emision'].search([], limit=1)
+        self.assertEqual((ejecucion.worker, ejecucion.emitidos, ejecucion.fallidos), ('principal', 9, 1))
+
+    def test_reintento(self):
+        fallida = self.inscripciones[0]
+        fallos = self._fallar_render(fallida)
+        Inscripcion = self.env['slide.channel.partner']
+        Inscripcion._cron_emitir_titulos_pendientes()
+        self.assertTrue(fallida.error_emision_titulo)
+
+        # Sin reintento, el CRON no vuelve a tocarla aunque el error ya esté resuelto
+        fallos['activo'] = False
+        self.assertEqual(Inscripcion._cron_emitir_titulos_pendientes()['fallidos'], 0)
+        self.assertFalse(fallida.titulo_emitido)
+
+        # Un administrador la devuelve a la cola
+        administrador = new_test_user(
+            self.env, 'admin_titulos',
+            groups='base.group_user,elearning_universidad.grupo_administrador_universidad'
+        )
+        fallida.with_user(administrador).action_reintentar_emision_titulo()
+        self.assertEqual(Inscripcion._cron_emitir_titulos_pendientes()['emitidos'], 1)
+        self.assertTrue(fallida.titulo_emitido)
+        self.assertFalse(fallida.error_emision_titulo)
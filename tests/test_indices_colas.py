@@ -0,0 +1,47 @@
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+
+@tagged('post_install', '-at_install')
+class TestIndicesColas(TransactionCase):
+    """ EXPLAIN de las consultas de los CRON: usan los índices parciales de sus colas """
+
+    def setUp(self):
+        super().setUp()
+        # Sin barridos secuenciales, el planificador elige el índice parcial si la consulta lo admite
+        self.env.cr.execute("SET enable_seqscan = off")
+        self.addCleanup(self.env.cr.execute, "RESET enable_seqscan")
+
+    def _plan(self, sql):
+        self.env.flush_all()
+        self.env.cr.execute(SQL("EXPLAIN %s", sql))
+        return "\n".join(row[0] for row in self.env.cr.fetchall())
+
+    def _plan_dominio(self, modelo, dominio):
+        """ Plan de la consulta que genera el ORM para el dominio """
+        return self._plan(self.env[modelo]._search(dominio).select())
+
+    def test_cola_publicacion_cursos(self):
+        plan = self._plan_dominio('slide.channel', [
+            ('estado_universidad', '=', 'programado'),
+            ('fecha_programada_publicacion', '<=', fields.Datetime.now()),
+        ])
+        self.assertIn('slide_channel_programado_fecha_idx', plan)
+
+    def test_cola_publicacion_contenidos(self):
+        plan = self._plan_dominio('slide.slide', [
+            ('is_published', '=', False),
+            ('fecha_programada', '!=', False),
+            ('fecha_programada', '<=', fields.Datetime.now()),
+        ])
+        self.assertIn('slide_slide_programado_fecha_idx', plan)
+
+    def test_cola_titulos(self):
+        Inscripcion = self.env['slide.channel.partner']
+        # Conteo del reparto entre workers (dominio ORM)
+        plan = self._plan_dominio('slide.channel.partner', Inscripcion._get_dominio_cola_titulos())
+        self.assertIn('slide_channel_partner_cola_titulos_idx', plan)
+        # Reclamación de lotes (SQL con FOR UPDATE SKIP LOCKED)
+        plan = self._plan(Inscripcion._sql_reclamar_lote_titulos(50))
+        self.assertIn('slide_channel_partner_cola_titulos_idx', plan)
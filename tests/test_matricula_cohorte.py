@@ -0,0 +1,57 @@
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestMatriculaCohorte(TransactionCase):
+    """ matricular_cohorte: matrícula en el Master y sus asignaturas con resumen de lo creado """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        director = new_test_user(
+            cls.env, 'director_cohorte',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        Channel = cls.env['slide.channel']
+        cls.master = Channel.create({
+            'name': 'Master Cohorte',
+            'tipo_curso': 'master',
+            'director_academico_ids': [(6, 0, director.ids)],
+        })
+        cls.asignaturas = Channel.create([{
+            'name': f'Asignatura Cohorte {index}',
+            'tipo_curso': 'asignatura',
+            'master_id': cls.master.id,
+        } for index in range(3)])
+        cls.env['slide.slide'].create([{
+            'name': f'Entregable {curso.name}',
+            'channel_id': curso.id,
+            'slide_category': 'article',
+            'es_evaluable': True,
+            'is_published': True,
+        } for curso in cls.asignaturas])
+        cls.alumnos = cls.env['res.partner'].create([
+            {'name': f'Alumno Cohorte {index}'} for index in range(50)
+        ])
+
+    def _registros(self):
+        return self.env['slide.slide.partner'].search([('partner_id', 'in', self.alumnos.ids)])
+
+    def test_resumen(self):
+        resumen = self.master.matricular_cohorte(self.alumnos)
+
+        cursos = self.master | self.asignaturas
+        self.assertEqual(resumen['alumnos'], 50)
+        self.assertEqual(resumen['inscripciones'], 50 * len(cursos))
+        self.assertEqual(resumen['inscripciones_por_curso'], {curso.id: 50 for curso in cursos})
+        self.assertEqual(resumen['registros_seguimiento'], len(self._registros()))
+        self.assertTrue(resumen['registros_seguimiento'] >= 50 * len(self.asignaturas))
+        for curso in cursos:
+            self.assertEqual(set(curso.channel_partner_ids.partner_id.ids) & set(self.alumnos.ids), set(self.alumnos.ids))
+
+    def test_resumen_sin_novedades(self):
+        self.master.matricular_cohorte(self.alumnos)
+        resumen = self.master.matricular_cohorte(self.alumnos.ids)
+        self.assertEqual(resumen['inscripciones'], 0)
+        self.assertEqual(resumen['inscripciones_por_curso'], {})
+        self.assertEqual(resumen['registros_seguimiento'], 0)
@@ -0,0 +1,55 @@
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestNotificacionesFlujo(TransactionCase):
+    """ Notificaciones del flujo de aprobación: mismo aviso a administradores en curso suelto y en lote """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        director = new_test_user(
+            cls.env, 'director_notificaciones',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        cls.cursos = cls.env['slide.channel'].create([{
+            'name': f'Microcredencial Notificada {index}',
+            'tipo_curso': 'microcredencial',
+            'director_academico_ids': [(6, 0, director.ids)],
+        } for index in range(4)])
+
+    def _resumenes(self, cursos):
+        """ Resúmenes enviados a los administradores (message_notify) """
+        return self.env['mail.message'].search([
+            ('model', '=', 'slide.channel'),
+            ('res_id', 'in', cursos.ids),
+            ('message_type', '=', 'user_notification'),
+        ])
+
+    def test_resumen_curso_suelto_y_lote(self):
+        suelto, lote = self.cursos[:1], self.cursos[1:]
+        suelto.action_presentar()
+        lote.action_presentar()
+
+        # Un único resumen por transición, con los administradores como destinatarios
+        resumen_suelto, resumen_lote = self._resumenes(suelto), self._resumenes(lote)
+        self.assertEqual(len(resumen_suelto), 1)
+        self.assertEqual(len(resumen_lote), 1)
+        admins = self.env['slide.channel']._get_partners_administradores()
+        self.assertEqual(resumen_suelto.partner_ids, admins)
+        self.assertEqual(resumen_lote.partner_ids, admins)
+
+        # El chatter de cada curso registra la transición sin destinatarios explícitos
+        for curso in self.cursos:
+            nota = curso.message_ids.filtered(lambda m: 'presentado para revisión' in (m.body or ''))
+            self.assertEqual(len(nota), 1)
+            self.assertFalse(nota.partner_ids)
+
+    def test_motivo_escapado(self):
+        curso = self.cursos[0]
+        curso.action_presentar()
+        curso.action_rechazar('<script>alert(1)</script>')
+        mensaje = curso.message_ids.filtered(lambda m: 'Motivo' in (m.body or ''))
+        self.assertEqual(len(mensaje), 1)
+        self.assertNotIn('<script>', mensaje.body)
+        self.assertIn('&lt;script&gt;', mensaje.body)
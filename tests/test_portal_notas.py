@@ -0,0 +1,93 @@
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestArbolNotasPortal(TransactionCase):
+    """ /my/grades: el árbol de notas se construye con un número constante de consultas """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.director = new_test_user(
+            cls.env, 'director_notas',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        cls.alumno_pocos = new_test_user(cls.env, 'alumno_pocos_cursos', groups='base.group_portal').partner_id
+        cls.alumno_muchos = new_test_user(cls.env, 'alumno_muchos_cursos', groups='base.group_portal').partner_id
+        cls._crear_expediente(cls.alumno_pocos, asignaturas=1, microcredenciales=0)
+        cls._crear_expediente(cls.alumno_muchos, asignaturas=4, microcredenciales=3)
+
+    @classmethod
+    def _crear_expediente(cls, partner, asignaturas, microcredenciales):
+        """ Matricula al alumno en un Master (con sus asignaturas) y en microcredenciales,
+        con un contenido evaluado en cada asignatura y microcredencial.
+        """
+        Channel = cls.env['slide.channel']
+        directores = [(6, 0, cls.director.ids)]
+        master = Channel.create({
+            'name': f'Master {partner.name}',
+            'tipo_curso': 'master',
+            'director_academico_ids': directores,
+        })
+        cursos_asignatura = Channel.create([{
+            'name': f'Asignatura {index} {partner.name}',
+            'tipo_curso': 'asignatura',
+            'master_id': master.id,
+        } for index in range(asignaturas)])
+        micros = Channel.create([{
+            'name': f'Microcredencial {index} {partner.name}',
+            'tipo_curso': 'microcredencial',
+            'director_academico_ids': directores,
+        } for index in range(microcredenciales)])
+
+        # Duración en el Master (requisito de publicación) y publicación de las asignaturas
+        master.slide_ids.write({'completion_time': 2.0})
+        cursos_asignatura.action_publicar()
+
+        cursos = cursos_asignatura | micros
+        cls.env['slide.slide'].create([{
+            'name': f'Entregable {curso.name}',
+            'channel_id': curso.id,
+            'slide_category': 'article',
+            'es_evaluable': True,
+            'is_published': True,
+        } for curso in cursos])
+
+        (master | micros)._action_add_members(partner)
+        cls.env['slide.slide.partner'].search([
+            ('partner_id', '=', partner.id),
+            ('slide_id.channel_id', 'in', cursos.ids),
+        ]).write({'estado_evaluacion': 'evaluado', 'nota_evaluacion': 7.5})
+
+    def _inscripciones_portal(self, partner):
+        """ Inscripciones que lista /my/grades (Masters y Microcredenciales) """
+        return self.env['slide.channel.partner'].sudo().search([
+            ('partner_id', '=', partner.id),
+            ('channel_id.tipo_curso', '!=', 'asignatura'),
+        ])
+
+    def _construir_arbol(self, inscripciones):
+        """ Árbol de notas con la caché vacía, como en una petición nueva """
+        self.env.invalidate_all()
+        return inscripciones._get_arbol_notas_portal(inscripciones)
+
+    def test_consultas_constantes(self):
+        pocas = self._inscripciones_portal(self.alumno_pocos)
+        muchas = self._inscripciones_portal(self.alumno_muchos)
+        self.assertEqual(len(pocas), 1)
+        self.assertEqual(len(muchas), 4)
+
+        # Referencia: alumno con un Master de una sola asignatura
+        self.env.flush_all()
+        inicio = self.cr.sql_log_count
+        self._construir_arbol(pocas)
+        consultas = self.cr.sql_log_count - inicio
+
+        # Un Master con cuatro asignaturas y tres microcredenciales: mismas consultas
+        with self.assertQueryCount(consultas):
+            arbol = self._construir_arbol(muchas)
+
+        master = next(nodo for nodo in arbol if nodo['tipo_curso'] == 'master')
+        self.assertEqual(len(master['asignaturas']), 4)
+        for nodo in master['asignaturas'] + [nodo for nodo in arbol if nodo['tipo_curso'] == 'microcredencial']:
+            self.assertEqual([contenido['nota'] for contenido in nodo['contenidos']], [7.5])
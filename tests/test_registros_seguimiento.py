@@ -0,0 +1,139 @@
+from odoo import api
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestRegistrosSeguimiento(TransactionCase):
+    """ _asegurar_registros_seguimiento: inserción en lote y sin duplicados en un curso grande """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        director = new_test_user(
+            cls.env, 'director_seguimiento',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        cls.curso = cls.env['slide.channel'].create({
+            'name': 'Microcredencial Numerosa',
+            'tipo_curso': 'microcredencial',
+            'director_academico_ids': [(6, 0, director.ids)],
+        })
+        cls.slides = cls.env['slide.slide'].create([{
+            'name': f'Entregable {index}',
+            'channel_id': cls.curso.id,
+            'slide_category': 'article',
+            'es_evaluable': True,
+            'is_published': True,
+        } for index in range(3)])
+        cls.alumnos = cls.env['res.partner'].create([
+            {'name': f'Alumno {index}'} for index in range(200)
+        ])
+        cls.curso._action_add_members(cls.alumnos)
+
+    def _registros(self):
+        return self.env['slide.slide.partner'].search([
+            ('slide_id', 'in', self.slides.ids),
+            ('partner_id', 'in', self.alumnos.ids),
+        ])
+
+    def _contar_creates(self):
+        """ Cuenta las llamadas a slide.slide.partner.create (y sus registros) """
+        SlidePartner = type(self.env['slide.slide.partner'])
+        create_original = SlidePartner.create
+        llamadas = []
+
+        @api.model_create_multi
+        def create(model, vals_list):
+            llamadas.append(len(vals_list))
+            return create_original(model, vals_list)
+
+        self.patch(SlidePartner, 'create', create)
+        return llamadas
+
+    def test_crea_faltantes_en_un_solo_create(self):
+        self.assertEqual(len(self._registros()), len(self.slides) * len(self.alumnos))
+
+        # Faltan los registros de la mitad de los alumnos en dos de los contenidos
+        faltantes = self._registros().filtered(
+            lambda r: r.slide_id in self.slides[:2] and r.partner_id in self.alumnos[:100]
+        )
+        faltantes.unlink()
+
+        llamadas = self._contar_creates()
+        creados = self.slides._asegurar_registros_seguimiento()
+
+        self.assertEqual(creados, 200)
+        self.assertEqual(llamadas, [200])
+        registros = self._registros()
+        self.assertEqual(len(registros), len(self.slides) * len(self.alumnos))
+        pares = {(registro.slide_id.id, registro.partner_id.id) for registro in registros}
+        self.assertEqual(len(pares), len(registros))
+
+    def test_no_duplica_existentes(self):
+        llamadas = self._contar_creates()
+        self.assertEqual(self.slides._asegurar_registros_seguimiento(), 0)
+        self.assertEqual(self.slides._asegurar_registros_seguimiento(partner_ids=self.alumnos.ids), 0)
+        self.assertEqual(llamadas, [])
+        self.assertEqual(len(self._registros()), len(self.slides) * len(self.alumnos))
+
+
+@tagged('post_install', '-at_install')
+class TestRegistrosSeguimientoEscala(TransactionCase):
+    """ _asegurar_registros_seguimiento: mismas consultas y un solo create para cohortes de 10, 100 y 1.000 alumnos """
+
+    TAMANOS = (10, 100, 1000)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        director = new_test_user(
+            cls.env, 'director_seguimiento_escala',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        cls.slides_por_tamano = {}
+        for tamano in cls.TAMANOS:
+            curso = cls.env['slide.channel'].create({
+                'name': f'Microcredencial {tamano} alumnos',
+                'tipo_curso': 'microcredencial',
+                'director_academico_ids': [(6, 0, director.ids)],
+            })
+            cls.slides_por_tamano[tamano] = cls.env['slide.slide'].create([{
+                'name': f'Entregable {index}',
+                'channel_id': curso.id,
+                'slide_category': 'article',
+                'es_evaluable': True,
+                'is_published': True,
+            } for index in range(3)])
+            curso._action_add_members(cls.env['res.partner'].create([
+                {'name': f'Alumno {tamano}-{index}'} for index in range(tamano)
+            ]))
+
+    def _consultas(self, slides):
+        """ Consultas de _asegurar_registros_seguimiento con la caché vacía """
+        self.env.flush_all()
+        self.env.invalidate_all()
+        inicio = self.cr.sql_log_count
+        slides._asegurar_registros_seguimiento()
+        self.env.flush_all()
+        return self.cr.sql_log_count - inicio
+
+    def test_consultas_constantes_sin_faltantes(self):
+        consultas = {tamano: self._consultas(slides) for tamano, slides in self.slides_por_tamano.items()}
+        self.assertEqual(len(set(consultas.values())), 1, consultas)
+
+    def test_un_create_por_cohorte(self):
+        SlidePartner = type(self.env['slide.slide.partner'])
+        create_original = SlidePartner.create
+        llamadas = []
+
+        @api.model_create_multi
+        def create(model, vals_list):
+            llamadas.append(len(vals_list))
+            return create_original(model, vals_list)
+
+        self.patch(SlidePartner, 'create', create)
+        for tamano, slides in self.slides_por_tamano.items():
+            self.env['slide.slide.partner'].search([('slide_id', 'in', slides.ids)]).unlink()
+            llamadas.clear()
+            self.assertEqual(slides._asegurar_registros_seguimiento(), 3 * tamano)
+            self.assertEqual(llamadas, [3 * tamano])
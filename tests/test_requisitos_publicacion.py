@@ -0,0 +1,98 @@
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestRequisitosPublicacion(TransactionCase):
+    """ Requisitos de publicación: todos los fallos a la vez, consultas constantes y herencia de directores """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.director = new_test_user(
+            cls.env, 'director_publicacion',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        Channel = cls.env['slide.channel']
+        cls.master = Channel.create({
+            'name': 'Master Publicación',
+            'tipo_curso': 'master',
+            'director_academico_ids': [(6, 0, cls.director.ids)],
+        })
+        cls.master_sin_director = Channel.create({'name': 'Master Sin Director', 'tipo_curso': 'master'})
+
+    def _crear_cursos_incompletos(self, cantidad):
+        """ Microcredenciales sin director y asignaturas sin duración en el Master """
+        Channel = self.env['slide.channel']
+        micros = Channel.create([{
+            'name': f'Microcredencial Incompleta {index}',
+            'tipo_curso': 'microcredencial',
+        } for index in range(cantidad)])
+        asignaturas = Channel.create([{
+            'name': f'Asignatura Sin Duración {index}',
+            'tipo_curso': 'asignatura',
+            'master_id': self.master.id,
+        } for index in range(cantidad)])
+        return micros | asignaturas
+
+    def test_todas_las_infracciones(self):
+        cursos = self._crear_cursos_incompletos(5)
+        infracciones = cursos._get_infracciones_publicacion()
+        self.assertEqual(set(infracciones), set(cursos.ids))
+
+        # La validación informa de todos los cursos en un solo error
+        with self.assertRaises(ValidationError) as error:
+            cursos._validar_requisitos_publicacion()
+        for curso in cursos:
+            self.assertIn(f"'{curso.name}'", str(error.exception))
+
+    def test_informe_por_curso(self):
+        cursos = self._crear_cursos_incompletos(2)
+        cursos[0].name = 'Microcredencial <b>Incompleta</b>'
+        accion = cursos.action_informe_publicacion()
+        self.assertEqual(accion['res_model'], 'slide.channel.publicacion.informe.wizard')
+        wizard = self.env[accion['res_model']].browse(accion['res_id'])
+
+        # Una sección por curso, con sus incidencias como lista y los nombres escapados
+        self.assertEqual(wizard.cursos_con_infracciones, 4)
+        self.assertEqual(wizard.informe.count('<h5>'), 4)
+        self.assertEqual(wizard.informe.count('<li>'), sum(map(len, cursos._get_infracciones_publicacion().values())))
+        self.assertIn('Microcredencial &lt;b&gt;Incompleta&lt;/b&gt;', wizard.informe)
+
+    def test_consultas_constantes(self):
+        pocos = self._crear_cursos_incompletos(1)
+        muchos = self._crear_cursos_incompletos(20)
+
+        self.env.flush_all()
+        self.env.invalidate_all()
+        inicio = self.cr.sql_log_count
+        pocos._get_infracciones_publicacion()
+        consultas = self.cr.sql_log_count - inicio
+
+        self.env.invalidate_all()
+        with self.assertQueryCount(consultas):
+            infracciones = muchos._get_infracciones_publicacion()
+        self.assertEqual(len(infracciones), 40)
+
+    def test_herencia_al_crear(self):
+        asignaturas = self.env['slide.channel'].create([{
+            'name': f'Asignatura Heredada {index}',
+            'tipo_curso': 'asignatura',
+            'master_id': self.master.id,
+        } for index in range(3)])
+        self.assertEqual(asignaturas.director_academico_ids, self.director)
+
+    def test_herencia_al_publicar(self):
+        asignatura = self.env['slide.channel'].create({
+            'name': 'Asignatura Sin Directores',
+            'tipo_curso': 'asignatura',
+            'master_id': self.master_sin_director.id,
+        })
+        self.assertFalse(asignatura.director_academico_ids)
+
+        # El Master recibe director y duración después: la asignatura los hereda al publicarse
+        self.master_sin_director.write({'director_academico_ids': [(6, 0, self.director.ids)]})
+        self.master_sin_director.slide_ids.write({'completion_time': 2.0})
+        asignatura.action_publicar()
+        self.assertEqual(asignatura.estado_universidad, 'publicado')
+        self.assertEqual(asignatura.director_academico_ids, self.director)
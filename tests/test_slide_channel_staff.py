@@ -0,0 +1,59 @@
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestStaffNames(TransactionCase):
+    """ _compute_staff_names: número de consultas constante sea cual sea el tamaño del lote """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.director = new_test_user(
+            cls.env, 'director_universidad', name='Directora Académica',
+            groups='base.group_user,elearning_universidad.grupo_director_academico'
+        )
+        cls.docente = new_test_user(
+            cls.env, 'docente_universidad', name='Docente Universidad',
+            groups='base.group_user,elearning_universidad.grupo_personal_docente'
+        )
+        Channel = cls.env['slide.channel']
+        staff = {
+            'director_academico_ids': [(6, 0, cls.director.ids)],
+            'personal_docente_ids': [(6, 0, cls.docente.ids)],
+        }
+        cls.master = Channel.create({'name': 'Master', 'tipo_curso': 'master', **staff})
+        cls.asignaturas = Channel.create([{
+            'name': f'Asignatura {index}',
+            'tipo_curso': 'asignatura',
+            'master_id': cls.master.id,
+            'personal_docente_ids': [(6, 0, cls.docente.ids)],
+        } for index in range(5)])
+        cls.microcredenciales = Channel.create([{
+            'name': f'Microcredencial {index}',
+            'tipo_curso': 'microcredencial',
+            **staff,
+        } for index in range(5)])
+
+    def _recomputar_staff_names(self, canales):
+        """ Recalcula y guarda los nombres de staff de los cursos con la caché vacía """
+        self.env.invalidate_all()
+        for fname in ['director_academico_names', 'personal_docente_names']:
+            self.env.add_to_compute(canales._fields[fname], canales)
+        canales.flush_recordset(['director_academico_names', 'personal_docente_names'])
+
+    def test_consultas_constantes(self):
+        # Referencia: un solo curso
+        self.env.flush_all()
+        inicio = self.cr.sql_log_count
+        self._recomputar_staff_names(self.master)
+        consultas = self.cr.sql_log_count - inicio
+
+        # El lote completo (Master, asignaturas y microcredenciales) hace las mismas consultas
+        canales = self.master | self.asignaturas | self.microcredenciales
+        with self.assertQueryCount(consultas):
+            self._recomputar_staff_names(canales)
+
+        self.assertEqual(self.master.director_academico_names, 'Directora Académica')
+        # Las asignaturas muestran los directores de su Master
+        self.assertEqual(set(self.asignaturas.mapped('director_academico_names')), {'Directora Académica'})
+        self.assertEqual(set(self.microcredenciales.mapped('personal_docente_names')), {'Docente Universidad'})
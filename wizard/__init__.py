@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 from . import slide_channel_reject_wizard
 from . import slide_channel_schedule_wizard
+from . import slide_channel_publicacion_informe_wizard
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from markupsafe import Markup
+
+class SlideChannelPublicacionInformeWizard(models.TransientModel):
+    _name = 'slide.channel.publicacion.informe.wizard'
+    _description = 'Informe de requisitos de publicación de cursos'
+
+    channel_ids = fields.Many2many('slide.channel', string='Cursos', required=True)
+    cursos_con_infracciones = fields.Integer(string='Cursos con Incidencias', compute='_compute_informe')
+    informe = fields.Html(string='Informe', compute='_compute_informe', sanitize=False)
+
+    @api.depends('channel_ids')
+    def _compute_informe(self):
+        for wizard in self:
+            infracciones = wizard.channel_ids._get_infracciones_publicacion()
+            wizard.cursos_con_infracciones = len(infracciones)
+            if not infracciones:
+                wizard.informe = Markup("<p>%s</p>") % (
+                    _("Los %s cursos seleccionados cumplen los requisitos de publicación.") % len(wizard.channel_ids)
+                )
+                continue
+            # Una sección por curso con la lista de sus requisitos incumplidos
+            wizard.informe = Markup().join(
+                Markup("<h5>%s</h5><ul>%s</ul>") % (
+                    curso.display_name,
+                    Markup().join(Markup("<li>%s</li>") % mensaje for mensaje in infracciones[curso.id]),
+                )
+                for curso in wizard.channel_ids if curso.id in infracciones
+            )